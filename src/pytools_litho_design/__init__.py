@@ -1,3 +1,4 @@
+from . import cache
 from . import components
 from . import devices
 from . import experiments
@@ -0,0 +1,56 @@
+"""Small on-disk cache for expensive, deterministic geometry calculations.
+
+The cache directory defaults to ``~/.cache/pytools_litho_design`` and can be
+moved with the ``PYTOOLS_LITHO_DESIGN_CACHE`` environment variable. Entries are
+grouped per namespace and stored as ``.npz`` files named after a hash of the
+inputs they were computed from.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+CACHE_DIR = Path(
+    os.environ.get(
+        "PYTOOLS_LITHO_DESIGN_CACHE",
+        Path.home() / ".cache" / "pytools_litho_design",
+    )
+)
+
+
+def cache_key(*parts) -> str:
+    """Returns a short stable hash for the given (json serialisable) inputs."""
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:20]
+
+
+def load_arrays(namespace: str, key: str) -> dict[str, np.ndarray] | None:
+    """Loads a cached entry, returns None if it does not exist or is unreadable."""
+    path = CACHE_DIR / namespace / f"{key}.npz"
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    except (OSError, ValueError):
+        return None
+
+
+def save_arrays(namespace: str, key: str, **arrays: np.ndarray) -> None:
+    """Stores an entry in the cache.
+
+    Writing is best effort, a read-only or full disk only disables the cache.
+    """
+    directory = CACHE_DIR / namespace
+    path = directory / f"{key}.npz"
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so parallel builds never read half a file
+        tmp_path = directory / f"{key}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
@@ -11,10 +11,12 @@ from .couplers import (
 from .rings import two_ring_muxer, bend_two_ring_demuxer
 from .markers import ebl_marker, ebl_marker_jb
 from .pads import pad, pad_array
+from .geometries import texts
 from .geometries import (
     rectangle,
     spiral_racetrack,
     spiral_racetrack_fixed_length,
+    spiral_racetrack_fixed_length_array,
     y_split,
 )
 
@@ -112,4 +114,4 @@ def trenched_mmi1x2(
 
 
 # Tekst
-text = partial(gf.components.text, layer="COARSE_AU")
+text = partial(texts.text, layer="COARSE_AU")
@@ -3,4 +3,4 @@ from .grating_arrays import (
     grating_coupler_cluster,
     grating_coupler_opposing,
 )
-from .couplers import coupler, grating_coupler_traditional
+from .couplers import coupler, grating_coupler_traditional, grating_tooth
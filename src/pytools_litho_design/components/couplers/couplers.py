@@ -1,12 +1,63 @@
 import gdsfactory as gf
 from functools import partial
 import numpy as np
+from gdsfactory.typings import LayerSpec
+
+from ..geometries.sampling import (
+    chord_npoints,
+    get_arc_tolerance,
+    polygons_to_region,
+)
 
 
 # coupler = partial(gf.components.coupler)
 from gdsfactory.components import coupler, grating_coupler_elliptical_arbitrary
 
 
+def _arc_polygons(
+    inner_radii: np.ndarray, outer_radii: np.ndarray, phi: np.ndarray
+) -> np.ndarray:
+    """Returns the polygons of concentric arcs with shape (n_arcs, 2 * n_phi, 2).
+
+    All arcs share the same angles, so the cos and sin tables are computed once.
+    """
+    unit = np.column_stack((np.cos(phi), np.sin(phi)))
+    inner = inner_radii[:, None, None] * unit
+    outer = outer_radii[:, None, None] * unit[::-1]
+    return np.concatenate((inner, outer), axis=1)
+
+
+@gf.cell
+def grating_tooth(
+    inner_radius: float = 16,
+    outer_radius: float = 16.5,
+    opening_angle: float = 36,
+    layer: LayerSpec = "WG",
+    max_deviation: float = 1,
+) -> gf.Component:
+    """Returns a single grating tooth, an arc centered at the origin.
+
+    Parameters
+    ----------
+    inner_radius: float
+        The inner radius of the tooth in um.
+    outer_radius: float
+        The outer radius of the tooth in um.
+    opening_angle: float
+        The full opening angle of the tooth in degrees.
+    layer: LayerSpec
+        The layer of the tooth.
+    max_deviation: float
+        Maximum distance between the arcs and the ideal circles in nm.
+    """
+    c = gf.Component()
+    n = chord_npoints(outer_radius, max_deviation, opening_angle) + 1
+    phi = np.linspace(-np.deg2rad(opening_angle) / 2, np.deg2rad(opening_angle) / 2, n)
+    polygons = _arc_polygons(np.array([inner_radius]), np.array([outer_radius]), phi)
+    c.add_polygon(polygons_to_region(polygons, c.kcl.dbu), layer=layer)
+    return c
+
+
 @gf.cell
 def grating_coupler_traditional(
     cross_section="asic",
@@ -17,7 +68,21 @@ def grating_coupler_traditional(
     ap_max_ff=tuple(0.96 + np.arange(-0.02, 0.03, 0.02)),
     n_ap_gratings=20,
     taper_length=48,
+    max_deviation: float | None = None,
+    tooth_cells: bool = False,
 ) -> gf.Component:
+    """Returns a focusing grating coupler with circular teeth.
+
+    The arcs of the teeth and the taper are discretised so that they deviate
+    at most ``max_deviation`` nm from the ideal circles. If it is None, the
+    ``arc_tolerance`` constant of the active PDK is used.
+
+    With ``tooth_cells`` every tooth is a reference to a cached grating_tooth
+    cell with its radii snapped to the grid, so couplers in a parameter sweep
+    share their identical teeth instead of storing flat copies.
+    """
+    if max_deviation is None:
+        max_deviation = get_arc_tolerance()
     if isinstance(cross_section, str):
         cross_section = gf.get_cross_section(cross_section)
 
@@ -34,48 +99,49 @@ def grating_coupler_traditional(
     apodized_ffs = np.linspace(ap_max_ff[0], grating_ff[0], n_ap_gratings)
     apodized_periods = np.linspace(grating_period[0], grating_period[0], n_ap_gratings)
 
-    radii = [initial_radius]
-    for ap_period, ap_ff in zip(apodized_periods, apodized_ffs):
-        radii.append(ap_period * (1 - ap_ff))  # Gap
-        radii.append(ap_period * ap_ff)  # Material
+    # Handling of constant fill factor gratings, the parameters are cycled
+    periods = np.concatenate([apodized_periods, np.resize(grating_period, n_gratings)])
+    ffs = np.concatenate([apodized_ffs, np.resize(grating_ff, n_gratings)])
+    materials = periods * ffs
 
-    # Handling of constant fill factor gratings
-    for i in range(n_gratings):
-        period = grating_period[i % len(grating_period)]
-        ff = grating_ff[i % len(grating_ff)]
-        radii.append(period * (1 - ff))  # Gap
-        radii.append(period * ff)  # Material
+    # Every tooth starts after its gap and ends one period after the previous tooth
+    outer_radii = initial_radius + np.cumsum(periods)
+    inner_radii = outer_radii - materials
 
-    current_radius = radii[0]
     origin = (0, 0)
-    for i in range(1, len(radii), 2):
-        gap = radii[i]
-        material = radii[i + 1]
-        inner_radius = current_radius + gap
-        outer_radius = inner_radius + material
-
-        phi = np.linspace(-opening_angle, opening_angle, 100)
-        inner_arc = np.array(
-            [
-                np.cos(phi) * inner_radius + origin[0],
-                np.sin(phi) * inner_radius + origin[1],
-            ]
-        )
-        outer_arc = np.array(
-            [
-                np.cos(phi[::-1]) * outer_radius + origin[0],
-                np.sin(phi[::-1]) * outer_radius + origin[1],
-            ]
-        )
-
-        grating_polygon = np.column_stack((inner_arc, outer_arc)).T
-        c.add_polygon(grating_polygon, layer=cross_section.layer)
-
-        current_radius = outer_radius
+    opening_angle_deg = np.rad2deg(full_opening_angle)
+
+    if tooth_cells:
+        for inner_radius, outer_radius in zip(
+            gf.snap.snap_to_grid(inner_radii), gf.snap.snap_to_grid(outer_radii)
+        ):
+            tooth = c << grating_tooth(
+                inner_radius=float(inner_radius),
+                outer_radius=float(outer_radius),
+                opening_angle=round(float(opening_angle_deg), 9),
+                layer=cross_section.layer,
+                max_deviation=max_deviation,
+            )
+            tooth.dmove(origin)
+    else:
+        # Teeth that need the same number of points are drawn together
+        n_points = chord_npoints(outer_radii, max_deviation, opening_angle_deg) + 1
+        teeth = gf.kdb.Region()
+        for n in np.unique(n_points):
+            phi = np.linspace(-opening_angle, opening_angle, n)
+            polygons = _arc_polygons(
+                inner_radii[n_points == n], outer_radii[n_points == n], phi
+            )
+            teeth += polygons_to_region(polygons + np.array(origin), c.kcl.dbu)
+        c.add_polygon(teeth, layer=cross_section.layer)
 
     # Add the taper
-    taper_radius = radii[0]
-    taper_phi = np.linspace(-opening_angle, opening_angle, 100)
+    taper_radius = initial_radius
+    taper_phi = np.linspace(
+        -opening_angle,
+        opening_angle,
+        chord_npoints(taper_radius, max_deviation, opening_angle_deg) + 1,
+    )
     taper_xpts = np.cos(taper_phi) * taper_radius + origin[0]
     taper_ypts = np.sin(taper_phi) * taper_radius + origin[1]
 
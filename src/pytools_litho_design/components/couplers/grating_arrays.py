@@ -1,8 +1,130 @@
 import gdsfactory as gf
+import numpy as np
 from functools import partial
 from gdsfactory.typings import ComponentSpec, CrossSectionSpec
 
 
+@gf.cell
+def grating_array_loopback(
+    margin: float,
+    depth: float,
+    pitch: float = 127,
+    n: int = 5,
+    cross_section: CrossSectionSpec = "strip",
+    with_loss_structure: bool = False,
+) -> gf.Component:
+    """Create the loopback and loss routes of a grating coupler array.
+
+    The routes connect the outer ports of an array of n upward facing ports
+    with the given pitch. They only depend on the footprint of the gratings,
+    so arrays that differ only in the grating coupler share this cell. The
+    ports o0 to o{n-1} mark where the grating ports have to be.
+
+    Parameters:
+        margin: float
+            Distance from the outer grating ports to the sides of the array,
+            measured on the grating coupler that is used.
+        depth: float
+            Distance from the grating ports to the bottom of the array,
+            measured on the grating coupler that is used.
+        pitch: float
+            Pitch between grating couplers.
+        n: int
+            Number of grating couplers in the array.
+        cross_section: CrossSectionSpec
+            Cross-section for the waveguides.
+        with_loss_structure: bool
+            Whether to include the loss structure next to the loopback.
+
+    Returns:
+        gf.Component with the routes.
+    """
+    if isinstance(cross_section, str):
+        cross_section = gf.get_cross_section(cross_section)
+
+    CHIP = gf.Component()
+    x = (np.arange(n) - (n - 1) / 2) * pitch
+    for i in range(n):
+        port = CHIP.add_port(
+            name=f"o{i}",
+            center=(x[i], 0),
+            orientation=90,
+            cross_section=cross_section,
+        )
+        # The router only accepts ports with a transformation on the grid
+        port.trans = gf.kdb.Trans(1, False, round(x[i] / CHIP.kcl.dbu), 0)
+    ports = CHIP.ports
+    xmin, xmax, ymin = x[0] - margin, x[-1] + margin, -depth
+
+    # Create a short piece of waveguide to use as a checkpoint during routing
+    CHECKPOINT = gf.components.straight(
+        cross_section=cross_section,
+    )
+    radius = cross_section.radius_min
+    bend = gf.get_component("bend_euler", cross_section=cross_section, radius=radius)
+
+    loopback_checkpoint1 = CHIP << CHECKPOINT
+    loopback_checkpoint1.center = (xmin, ymin - 1.5 * cross_section.radius)
+
+    loopback_checkpoint2 = CHIP << CHECKPOINT
+    loopback_checkpoint2.center = (xmax, ymin - 1.5 * cross_section.radius)
+
+    gf.routing.route_bundle(
+        CHIP,
+        [ports["o0"]],
+        [loopback_checkpoint1.ports["o1"]],
+        cross_section=cross_section,
+        end_straight_length=cross_section.radius,
+        bend=bend,
+    )
+    gf.routing.route_bundle(
+        CHIP,
+        [ports[f"o{n-1}"]],
+        [loopback_checkpoint2.ports["o2"]],
+        cross_section=cross_section,
+        end_straight_length=cross_section.radius,
+        bend=bend,
+    )
+    gf.routing.route_single(
+        CHIP,
+        loopback_checkpoint1.ports["o2"],
+        loopback_checkpoint2.ports["o1"],
+        cross_section=cross_section,
+        bend=bend,
+    )
+
+    if with_loss_structure:
+        # Position the checkpoints below the grating array
+        loss_checkpoint1 = CHIP << CHECKPOINT
+        loss_checkpoint1.center = (
+            xmin - cross_section.radius,
+            ymin - 2.5 * cross_section.radius,
+        )
+        loss_checkpoint2 = CHIP << CHECKPOINT
+        loss_checkpoint2.center = (
+            xmax + cross_section.radius,
+            ymin - 2.5 * cross_section.radius,
+        )
+
+        gf.routing.route_bundle(
+            CHIP,
+            [ports["o1"], ports[f"o{n-2}"]],
+            [loss_checkpoint1.ports["o1"], loss_checkpoint2.ports["o2"]],
+            cross_section=cross_section,
+            start_straight_length=cross_section.radius,
+            end_straight_length=cross_section.radius,
+            bend=bend,
+        )
+        gf.routing.route_single(
+            CHIP,
+            loss_checkpoint1.ports["o2"],
+            loss_checkpoint2.ports["o1"],
+            cross_section=cross_section,
+            bend=bend,
+        )
+    return CHIP
+
+
 @gf.cell
 def grating_coupler_array(
     grating_coupler: ComponentSpec = "grating_coupler_elliptical",
@@ -57,105 +179,30 @@ def grating_coupler_array(
     CHIP = gf.Component()
     grating_array = CHIP << GRATING_ARRAY
 
-    # Add the alignment and loss structure
-    # Create a short piece of waveguide to use as a checkpoint during routing
-    CHECKPOINT = gf.components.straight(
-        cross_section=cross_section,
-    )
-    radius = cross_section.radius_min
-
-    if with_loopback:
-        loopback_checkpoint1 = CHIP << CHECKPOINT
-        loopback_checkpoint1.center = (
-            grating_array.xmin,
-            grating_array.ymin - 1.5 * cross_section.radius,
-        )
-
-        loopback_checkpoint2 = CHIP << CHECKPOINT
-        loopback_checkpoint2.center = (
-            grating_array.xmax,
-            grating_array.ymin - 1.5 * cross_section.radius,
-        )
-
-        gf.routing.route_bundle(
-            CHIP,
-            [
-                grating_array.ports["o0"],
-            ],
-            [
-                loopback_checkpoint1.ports["o1"],
-            ],
-            cross_section=cross_section,
-            # start_straight_length=cross_section.radius_min,
-            end_straight_length=cross_section.radius,
-            bend=gf.get_component(
-                "bend_euler", cross_section=cross_section, radius=radius
-            ),
-        )
-        gf.routing.route_bundle(
-            CHIP,
-            [
-                grating_array.ports[f"o{n-1}"],
-            ],
-            [
-                loopback_checkpoint2.ports["o2"],
-            ],
-            cross_section=cross_section,
-            end_straight_length=cross_section.radius,
-            bend=gf.get_component(
-                "bend_euler", cross_section=cross_section, radius=radius
-            ),
-        )
-        gf.routing.route_single(
-            CHIP,
-            loopback_checkpoint1.ports["o2"],
-            loopback_checkpoint2.ports["o1"],
-            cross_section=cross_section,
-            bend=gf.get_component(
-                "bend_euler", cross_section=cross_section, radius=radius
-            ),
-        )
     if with_loss_structure and not with_loopback:
         raise ValueError("Loss structure cannot be enabled without loopback.")
 
-    if with_loss_structure:
-        # Position the checkpoints below the grating array
-        loss_checkpoint1 = CHIP << CHECKPOINT
-        loss_checkpoint1.center = (
-            grating_array.xmin - cross_section.radius,
-            grating_array.ymin - 2.5 * cross_section.radius,
-        )
-        loss_checkpoint2 = CHIP << CHECKPOINT
-        loss_checkpoint2.center = (
-            grating_array.xmax + cross_section.radius,
-            grating_array.ymin - 2.5 * cross_section.radius,
-        )
-
-        gf.routing.route_bundle(
-            CHIP,
-            [
-                grating_array.ports["o1"],
-                grating_array.ports[f"o{n-2}"],
-            ],
-            [
-                loss_checkpoint1.ports["o1"],
-                loss_checkpoint2.ports["o2"],
-            ],
+    # Add the alignment and loss structure, the routes only depend on the
+    # footprint of the array so they come from a cached template cell
+    if with_loopback:
+        LOOPBACK = grating_array_loopback(
+            pitch=pitch,
+            n=n,
             cross_section=cross_section,
-            start_straight_length=cross_section.radius,
-            end_straight_length=cross_section.radius,
-            bend=gf.get_component(
-                "bend_euler", cross_section=cross_section, radius=radius
+            margin=float(
+                gf.snap.snap_to_grid(grating_array.ports["o0"].x - grating_array.xmin)
             ),
-        )
-        gf.routing.route_single(
-            CHIP,
-            loss_checkpoint1.ports["o2"],
-            loss_checkpoint2.ports["o1"],
-            cross_section=cross_section,
-            bend=gf.get_component(
-                "bend_euler", cross_section=cross_section, radius=radius
+            depth=float(
+                gf.snap.snap_to_grid(grating_array.ports["o0"].y - grating_array.ymin)
             ),
+            with_loss_structure=with_loss_structure,
+        )
+        loopback = CHIP << LOOPBACK
+        loopback.dmove(
+            (
+                grating_array.ports["o0"].x - LOOPBACK.ports["o0"].x,
+                grating_array.ports["o0"].y - LOOPBACK.ports["o0"].y,
+            )
         )
 
     if with_loopback and with_loss_structure:
@@ -184,9 +231,18 @@ def grating_coupler_cluster(
     row_offset: int = 150,
     column_offset: int = 600,
     cross_section: CrossSectionSpec = "strip",
+    rows: int = 4,
+    columns: int = 2,
+    guide_spacing: float | None = None,
 ) -> gf.Component:
     """Create a cluster of grating couplers.
 
+    The couplers are placed on a grid with alternating orientations, like a
+    checkerboard. Couplers whose port faces east are routed to outputs above
+    the cluster, the ones facing west to outputs below it, with a single
+    bundle per side of every column. The output ports are numbered row by row, starting at the
+    top right coupler.
+
     Parameters:
         coupler: ComponentSpec
             Grating coupler component or name.
@@ -196,6 +252,12 @@ def grating_coupler_cluster(
             Horizontal offset between columns of grating couplers.
         cross_section: CrossSectionSpec
             Cross-section for the waveguides.
+        rows: int
+            Number of rows of grating couplers.
+        columns: int
+            Number of columns of grating couplers.
+        guide_spacing: float | None
+            Spacing between the output waveguides, defaults to column_offset / (rows + 2).
 
     Returns:
         gf.Component of the grating coupler cluster.
@@ -204,133 +266,70 @@ def grating_coupler_cluster(
         cross_section = gf.get_cross_section(cross_section)
     if isinstance(coupler, str):
         coupler = gf.get_component(coupler)
+    # The outputs of two neighbouring columns share the space between them
+    guide_spacing = guide_spacing or column_offset / (rows + 2)
+    if columns > 1 and (rows + 2) * guide_spacing > column_offset:
+        raise ValueError(
+            f"guide_spacing {guide_spacing} is too large, the routes of {rows} rows "
+            f"only fit between the columns for at most {column_offset / (rows + 2)}"
+        )
+
+    # Grid positions, counted from the top right coupler which stays in place
+    center = coupler.dbbox().center()
+    row, column = np.meshgrid(np.arange(rows), np.arange(columns), indexing="ij")
+    row, column = row.ravel(), column.ravel()
+    from_right = columns - 1 - column
+    x = center.x - from_right * column_offset
+    y = center.y - row * row_offset
+    numbers = row * columns + from_right + 1
+    east = (row + from_right) % 2 == 1
+
+    # Outputs of a column are stacked away from it, the top outputs in row
+    # order and the bottom ones in reverse, so the routes never cross
+    group = column * 2 + east
+    order = np.lexsort((row, group))
+    rank = np.empty(len(row), dtype=int)
+    rank[order] = np.arange(len(row)) - np.searchsorted(group[order], group[order])
+    group_size = np.bincount(group)[group]
+    k = np.where(east, rank, group_size - 1 - rank)
+    output_x = x + np.where(east, 1, -1) * (1.5 + k) * guide_spacing
+    output_y = center.y + np.where(east, row_offset, -rows * row_offset)
 
     # Create the chip and create the layout
     CHIP = gf.Component()
-    grating1 = CHIP << coupler
-    grating2 = CHIP << coupler
-    grating3 = CHIP << coupler
-    grating4 = CHIP << coupler
-    grating5 = CHIP << coupler
-    grating6 = CHIP << coupler
-    grating7 = CHIP << coupler
-    grating8 = CHIP << coupler
-
-    # Position the gratings
-    grating2.rotate(180)
-    grating2.center = (grating1.x - column_offset, grating1.y)
-    grating3.rotate(180)
-    grating3.center = (grating1.x, grating1.y - row_offset)
-    grating4.center = (grating2.x, grating2.y - row_offset)
-    grating5.center = (grating3.x, grating3.y - row_offset)
-    grating6.rotate(180)
-    grating6.center = (grating4.x, grating4.y - row_offset)
-    grating7.rotate(180)
-    grating7.center = (grating5.x, grating5.y - row_offset)
-    grating8.center = (grating6.x, grating6.y - row_offset)
-
-    # Create 4 ports at the top and 4 at the bottom
     OUTPUT_GUIDE = gf.components.waveguides.straight(
         length=10,
         cross_section=cross_section,
     )
-    output1 = CHIP << OUTPUT_GUIDE
-    output2 = CHIP << OUTPUT_GUIDE
-    output3 = CHIP << OUTPUT_GUIDE
-    output4 = CHIP << OUTPUT_GUIDE
-    output5 = CHIP << OUTPUT_GUIDE
-    output6 = CHIP << OUTPUT_GUIDE
-    output7 = CHIP << OUTPUT_GUIDE
-    output8 = CHIP << OUTPUT_GUIDE
-
-    # 1, 4, 5, 8 at the bottom
-    guide_spacing = column_offset / 6
-    output_offset = row_offset
-    output5.rotate(-90)
-    output5.center = (grating7.x - 1.5 * guide_spacing, grating7.y - output_offset)
-    output1.rotate(-90)
-    output1.center = (grating7.x - 2.5 * guide_spacing, grating7.y - output_offset)
-    output8.rotate(-90)
-    output8.center = (grating8.x - 1.5 * guide_spacing, grating8.y - output_offset)
-    output4.rotate(-90)
-    output4.center = (grating8.x - 2.5 * guide_spacing, grating8.y - output_offset)
-
-    # 2, 3, 6, 7 at the top
-    output6.rotate(90)
-    output6.center = (grating1.x - 3.5 * guide_spacing, grating1.y + output_offset)
-    output2.rotate(90)
-    output2.center = (grating1.x - 4.5 * guide_spacing, grating1.y + output_offset)
-    output3.rotate(90)
-    output3.center = (grating1.x + 1.5 * guide_spacing, grating2.y + output_offset)
-    output7.rotate(90)
-    output7.center = (grating1.x + 2.5 * guide_spacing, grating2.y + output_offset)
-
-    # Route the waveguides
-    gf.routing.route_bundle(
-        CHIP,
-        [
-            grating1.ports["o1"],
-            grating5.ports["o1"],
-        ],
-        [
-            output1.ports["o1"],
-            output5.ports["o1"],
-        ],
-        cross_section=cross_section,
-    )
-    gf.routing.route_bundle(
-        CHIP,
-        [
-            grating3.ports["o1"],
-            grating7.ports["o1"],
-        ],
-        [
-            output3.ports["o1"],
-            output7.ports["o1"],
-        ],
-        cross_section=cross_section,
-    )
-    gf.routing.route_bundle(
-        CHIP,
-        [
-            grating2.ports["o1"],
-            grating6.ports["o1"],
-            #         grating7.ports["o1"],
-            #         grating8.ports["o1"],
-        ],
-        [
-            output2.ports["o1"],
-            output6.ports["o1"],
-            #         output7.ports["o1"],
-            #         output8.ports["o1"],
-        ],
-        cross_section=cross_section,
-    )
-    gf.routing.route_bundle(
-        CHIP,
-        [
-            grating4.ports["o1"],
-            grating8.ports["o1"],
-        ],
-        [
-            output4.ports["o1"],
-            output8.ports["o1"],
-        ],
-        cross_section=cross_section,
-    )
+    gratings = []
+    outputs = []
+    for i in range(len(row)):
+        grating = CHIP << coupler
+        if east[i]:
+            grating.rotate(180)
+        grating.center = (x[i], y[i])
+        gratings.append(grating)
+
+        output = CHIP << OUTPUT_GUIDE
+        output.rotate(90 if east[i] else -90)
+        output.center = (output_x[i], output_y[i])
+        outputs.append(output)
+
+    # Route the waveguides, one bundle per side of every column
+    for g in np.unique(group):
+        indices = np.flatnonzero(group == g)
+        gf.routing.route_bundle(
+            CHIP,
+            [gratings[i].ports["o1"] for i in indices],
+            [outputs[i].ports["o1"] for i in indices],
+            cross_section=cross_section,
+        )
 
-    FINAL_CHIP = gf.Component()
-    FINAL_CHIP << CHIP
-    FINAL_CHIP.add_port("o1", port=output1.ports["o2"], cross_section="strip")
-    FINAL_CHIP.add_port("o2", port=output2.ports["o2"], cross_section="strip")
-    FINAL_CHIP.add_port("o3", port=output3.ports["o2"], cross_section="strip")
-    FINAL_CHIP.add_port("o4", port=output4.ports["o2"], cross_section="strip")
-    FINAL_CHIP.add_port("o5", port=output5.ports["o2"], cross_section="strip")
-    FINAL_CHIP.add_port("o6", port=output6.ports["o2"], cross_section="strip")
-    FINAL_CHIP.add_port("o7", port=output7.ports["o2"], cross_section="strip")
-    FINAL_CHIP.add_port("o8", port=output8.ports["o2"], cross_section="strip")
-    FINAL_CHIP.flatten()
-    return FINAL_CHIP
+    for i in np.argsort(numbers):
+        CHIP.add_port(
+            f"o{numbers[i]}", port=outputs[i].ports["o2"], cross_section="strip"
+        )
+    return CHIP
 
 
 @gf.cell
@@ -1,10 +1,22 @@
 from functools import partial
 import gdsfactory as gf
-from .racetrack import spiral_racetrack, spiral_racetrack_fixed_length
+from .racetrack import (
+    spiral_racetrack,
+    spiral_racetrack_fixed_length,
+    spiral_racetrack_fixed_length_array,
+)
 from .angled_tapers import angled_taper
 from .hyper_tapers import hyper_taper
 from .tapers import taper, taper_to_ridge, optical_taper, electrical_taper, sine_taper
 from .y_splitter import y_split
-from .protection_masks import add_protection_mask
+from .protection_masks import (
+    add_protection_mask,
+    get_protection_mask_region,
+    protection_mask,
+)
+from .rounding import round_region, rounded_rectangle
+from .tiling import tiled_region, invert_layer
+from .negative_tone import extrude_sections, neg_straight, neg_bend
+from .texts import glyph, text
 
 rectangle = partial(gf.components.rectangle, layer="ASIC")
@@ -5,9 +5,17 @@ import numpy as np
 from typing import Tuple, List, Union, Optional
 import gdsfactory as gf
 
+from .sampling import get_arc_tolerance, sample_by_deviation
+
 
 @gf.cell
-def hyper_taper(length=10, wide_section=50, narrow_section=5, layer=1) -> gf.Component:
+def hyper_taper(
+    length=10,
+    wide_section=50,
+    narrow_section=5,
+    layer=1,
+    max_deviation: Optional[float] = None,
+) -> gf.Component:
     """Hyperbolic taper (solid). Designed by colang.
 
     See the original code at [qnngds](https://github.com/qnngroup/qnngds/tree/master?tab=readme-ov-file).
@@ -23,34 +31,39 @@ def hyper_taper(length=10, wide_section=50, narrow_section=5, layer=1) -> gf.Com
         Narrow width dimension.
     layer: int
         Layer for device to be created on.
+    max_deviation: float or None
+        Maximum distance between the polygon and the ideal edges in nm,
+        defaults to the arc tolerance of the active PDK.
 
     Returns
     -------
     Component
         The hyper taper.
     """
+    if max_deviation is None:
+        max_deviation = get_arc_tolerance()
 
     taper_length = length
     wide = wide_section
-    zero = 0
     narrow = narrow_section
-    x_list = np.arange(0, taper_length + 0.1, 0.1)
-    x_list2 = np.arange(taper_length, -0.1, -0.1)
-    pts = []
-
     a = np.arccosh(wide / narrow) / taper_length
 
-    for x in x_list:
-        pts.append((x, np.cosh(a * x) * narrow / 2))
-    for y in x_list2:
-        pts.append((y, -np.cosh(a * y) * narrow / 2))
-        HT = gf.Component()
-        _ = HT.add_polygon(pts, layer=layer)
-        HT.add_port(name="1", center=[0, 0], width=narrow, orientation=180, layer=layer)
-        HT.add_port(
-            name="2", center=[taper_length, 0], width=wide, orientation=0, layer=layer
-        )
-        HT.flatten()
+    # Sample the edge densely and keep only the vertices the tolerance needs
+    num_points = max(int(np.ceil(taper_length / 0.01)), 100) + 1
+    x = np.linspace(0, taper_length, num_points)
+    y = np.cosh(a * x) * narrow / 2
+    x, y = sample_by_deviation(x, y, max_deviation)
+
+    # The bottom edge is the mirrored top edge, traversed backwards
+    top = np.column_stack([x, y])
+    bottom = np.column_stack([x[::-1], -y[::-1]])
+
+    HT = gf.Component()
+    HT.add_polygon(np.concatenate([top, bottom]), layer=layer)
+    HT.add_port(name="1", center=[0, 0], width=narrow, orientation=180, layer=layer)
+    HT.add_port(
+        name="2", center=[taper_length, 0], width=wide, orientation=0, layer=layer
+    )
     return HT
 
 
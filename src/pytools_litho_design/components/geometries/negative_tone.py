@@ -0,0 +1,205 @@
+"""Extrusion of cross sections for negative tone resists.
+
+In a negative tone process the waveguide is defined by the trenches around it,
+so the cross sections have a hidden core section that sets the width of the
+waveguide and visible trench sections next to it. When the core is tapered the
+trenches have to follow its edges, which the extrusion below takes care of.
+"""
+
+import gdsfactory as gf
+import numpy as np
+from gdsfactory.typings import CrossSectionSpec
+
+from .sampling import chord_npoints, get_arc_tolerance, polygons_to_region
+
+
+def _normals(points: np.ndarray, start_angle: float, end_angle: float) -> np.ndarray:
+    """Returns the left hand normals of a polyline, scaled to miter its corners."""
+    segments = np.diff(points, axis=0)
+    segments /= np.linalg.norm(segments, axis=1, keepdims=True)
+
+    tangents = np.empty_like(points)
+    tangents[0] = np.cos(np.radians(start_angle)), np.sin(np.radians(start_angle))
+    tangents[-1] = np.cos(np.radians(end_angle)), np.sin(np.radians(end_angle))
+    # The bisector of two unit segments, scaled so that offset edges stay
+    # parallel to the segments at the given distance
+    bisectors = segments[:-1] + segments[1:]
+    tangents[1:-1] = 2 * bisectors / np.sum(bisectors**2, axis=1, keepdims=True)
+    return np.column_stack((-tangents[:, 1], tangents[:, 0]))
+
+
+def extrude_sections(
+    path: gf.Path,
+    cross_section: CrossSectionSpec,
+    width1: float | None = None,
+    width2: float | None = None,
+) -> dict[int, gf.kdb.Region]:
+    """Returns the visible sections of a cross section along a path.
+
+    The edges of all sections are offset from the path in one vectorized pass
+    and the sections are returned as one merged region per layer. The core
+    width changes linearly from ``width1`` to ``width2`` along the path, every
+    section edge moves with the core edge on its side of the path, so trenches
+    stay attached to a tapered core.
+
+    Parameters
+    ----------
+    path: gf.Path
+        The center line.
+    cross_section: CrossSectionSpec
+        The cross section, hidden sections (like the core of a negative tone
+        cross section) are not drawn.
+    width1: float | None
+        The core width at the start of the path, defaults to the width of the
+        cross section.
+    width2: float | None
+        The core width at the end of the path, defaults to width1.
+
+    Returns
+    -------
+    dict[int, gf.kdb.Region]
+        The regions in database units by layer index.
+    """
+    xs = gf.get_cross_section(cross_section)
+    width1 = xs.width if width1 is None else width1
+    width2 = width1 if width2 is None else width2
+
+    points = np.asarray(path.points, dtype=float)
+    normals = _normals(points, path.start_angle, path.end_angle)
+
+    # How far the core edges moved from the nominal width at every point
+    distance = np.concatenate(
+        ([0.0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1)))
+    )
+    fraction = distance / distance[-1] if distance[-1] else np.zeros_like(distance)
+    shift = (width1 + (width2 - width1) * fraction - xs.width) / 2
+
+    sections = [section for section in xs.sections if not section.hidden]
+    if not sections:
+        return {}
+    edges = np.array(
+        [
+            (section.offset - section.width / 2, section.offset + section.width / 2)
+            for section in sections
+        ]
+    )
+    # Offsets with shape (sections, 2 edges, points), each edge follows the
+    # core edge on its own side of the path
+    offsets = edges[:, :, None] + np.sign(edges)[:, :, None] * shift
+    sides = points + offsets[..., None] * normals
+    polygons = np.concatenate((sides[:, 0], sides[:, 1, ::-1]), axis=1)
+
+    layers = np.array([gf.get_layer(section.layer) for section in sections])
+    regions = {}
+    for layer in np.unique(layers):
+        region = polygons_to_region(polygons[layers == layer], gf.kcl.dbu)
+        regions[int(layer)] = region.merged()
+    return regions
+
+
+def _add_sections(
+    c: gf.Component,
+    path: gf.Path,
+    cross_section: CrossSectionSpec,
+    width1: float | None = None,
+    width2: float | None = None,
+) -> None:
+    for layer, region in extrude_sections(path, cross_section, width1, width2).items():
+        c.add_polygon(region, layer=layer)
+
+
+def _add_ports(
+    c: gf.Component,
+    path: gf.Path,
+    xs: gf.CrossSection,
+    width: float,
+) -> None:
+    port_names = xs.sections[0].port_names
+    port_types = xs.sections[0].port_types
+    ends = (
+        (path.points[0], path.start_angle + 180),
+        (path.points[-1], path.end_angle),
+    )
+    for name, port_type, (center, orientation) in zip(port_names, port_types, ends):
+        c.add_port(
+            name=name,
+            center=tuple(gf.snap.snap_to_grid(center)),
+            width=width,
+            orientation=orientation % 360,
+            layer=xs.layer,
+            cross_section=xs,
+            port_type=port_type,
+        )
+
+
+@gf.cell
+def neg_straight(
+    length: float = 10.0,
+    width: float | None = None,
+    cross_section: CrossSectionSpec = "strip",
+) -> gf.Component:
+    """Returns a straight waveguide drawn as its (negative tone) sections.
+
+    Parameters
+    ----------
+    length: float
+        The length of the straight.
+    width: float | None
+        The core width, defaults to the width of the cross section.
+    cross_section: CrossSectionSpec
+        The cross section of the straight.
+    """
+    xs = gf.get_cross_section(cross_section)
+    width = xs.width if width is None else width
+
+    c = gf.Component()
+    path = gf.path.straight(length=length, npoints=2)
+    _add_sections(c, path, xs, width)
+    _add_ports(c, path, xs, width)
+    c.info["length"] = length
+    return c
+
+
+@gf.cell
+def neg_bend(
+    radius: float | None = None,
+    angle: float = 90,
+    width: float | None = None,
+    cross_section: CrossSectionSpec = "strip",
+    max_deviation: float | None = None,
+) -> gf.Component:
+    """Returns a circular bend drawn as its (negative tone) sections.
+
+    Parameters
+    ----------
+    radius: float | None
+        The radius of the bend, defaults to the radius of the cross section.
+    angle: float
+        The angle of the bend in degrees, positive angles bend to the left.
+    width: float | None
+        The core width, defaults to the width of the cross section.
+    cross_section: CrossSectionSpec
+        The cross section of the bend.
+    max_deviation: float | None
+        Maximum distance between the outer edge and the ideal arc in nm,
+        defaults to the arc tolerance of the active PDK.
+    """
+    xs = gf.get_cross_section(cross_section)
+    width = xs.width if width is None else width
+    radius = xs.radius if radius is None else radius
+    if max_deviation is None:
+        max_deviation = get_arc_tolerance()
+
+    # The outermost edge has the largest deviation for a given number of points
+    outer_radius = radius + max(
+        abs(section.offset) + section.width / 2 for section in xs.sections
+    )
+    npoints = chord_npoints(outer_radius, max_deviation, angle) + 1
+
+    c = gf.Component()
+    path = gf.path.arc(radius=radius, angle=angle, npoints=npoints)
+    _add_sections(c, path, xs, width)
+    _add_ports(c, path, xs, width)
+    c.info["length"] = float(path.length())
+    c.info["radius"] = radius
+    return c
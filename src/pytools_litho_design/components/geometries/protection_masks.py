@@ -1,24 +1,242 @@
 import gdsfactory as gf
+import numpy as np
 from gdsfactory.typings import LayerSpec, ComponentSpec
 
+from .rounding import corner_npoints, round_region
+from .tiling import tiled_region
+
+
+def get_protection_mask_region(
+    component: gf.Component,
+    component_layers: list[LayerSpec],
+    offset: float = 3,
+    corner_radius: float | None = None,
+    max_deviation: float = 1,
+    tile_size: float | None = None,
+    threads: int | None = None,
+) -> gf.kdb.Region:
+    """Returns the protection mask of a component as a region.
+
+    The geometries on the component layers are collected straight from the
+    cell hierarchy into a single region, which is then merged and dilated in
+    one pass. The component itself is not copied or flattened. For large
+    dies the same operation can run on overlapping tiles in parallel.
+
+    Parameters
+    ----------
+    component: gf.Component
+        The component to create the protection mask for.
+    component_layers: list[LayerSpec]
+        The layers of the component that will be protected.
+    offset: float
+        The distance by which the protection mask will be dilated.
+    corner_radius: float | None
+        The radius of the corners of the protection mask. If None, corners will not be rounded.
+    max_deviation: float
+        Maximum distance between the rounded corners and the ideal arcs in nm.
+    tile_size: float | None
+        If given, the mask is computed in tiles of this size in um.
+    threads: int | None
+        The number of threads used for tiling, defaults to the number of CPUs.
+
+    Returns
+    -------
+    gf.kdb.Region
+        The merged and dilated protection mask in database units.
+    """
+    dbu = component.kcl.dbu
+    if tile_size is not None:
+        size = round(offset / dbu)
+        expression = f"m.sized({size})"
+        if corner_radius is not None:
+            num_points = corner_npoints(corner_radius, 0, max_deviation)
+            expression += f".rounded_corners(0, {corner_radius / dbu}, {num_points})"
+        # The border has to cover the dilation and the reach of the rounding
+        return tiled_region(
+            component=component,
+            inputs={"m": component_layers},
+            expression=expression,
+            border=2 * (offset + (corner_radius or 0)),
+            tile_size=tile_size,
+            threads=threads,
+            frame=component.kdb_cell.bbox().enlarged(size),
+        )
+
+    region = gf.kdb.Region()
+    for layer in component_layers:
+        region.insert(component.begin_shapes_rec(gf.get_layer(layer)))
+
+    # Sizing merges the region, so this is the only boolean pass needed
+    region.size(round(offset / dbu))
+
+    if corner_radius is not None:
+        # Only the outer (convex) corners are rounded
+        round_region(region, corner_radius, max_deviation=max_deviation, dbu=dbu)
+    return region
+
+
+@gf.cell
+def protection_mask(
+    component: gf.Component,
+    protection_layer: LayerSpec,
+    component_layers: tuple[LayerSpec, ...],
+    offset: float = 3,
+    corner_radius: float | None = None,
+    max_deviation: float = 1,
+) -> gf.Component:
+    """Returns a cell that only contains the protection mask of a component.
+
+    The cell is cached, so every unique component gets its mask computed once.
+
+    Parameters
+    ----------
+    component: gf.Component
+        The component to create the protection mask for.
+    protection_layer: LayerSpec
+        The layer on which the protection mask will be created.
+    component_layers: tuple[LayerSpec, ...]
+        The layers of the component that will be protected.
+    offset: float
+        The distance by which the protection mask will be dilated.
+    corner_radius: float | None
+        The radius of the corners of the protection mask. If None, corners will not be rounded.
+    max_deviation: float
+        Maximum distance between the rounded corners and the ideal arcs in nm.
+    """
+    c = gf.Component()
+    mask = get_protection_mask_region(
+        component=component,
+        component_layers=list(component_layers),
+        offset=offset,
+        corner_radius=corner_radius,
+        max_deviation=max_deviation,
+    )
+    c.add_polygon(mask, layer=protection_layer)
+    return c
+
+
+def _touching_boxes(boxes: list[gf.kdb.Box]) -> np.ndarray:
+    """Flags every box that touches or overlaps at least one other box."""
+    coords = np.array([[b.left, b.bottom, b.right, b.top] for b in boxes])
+    coords = coords.reshape(-1, 4)
+    order = np.argsort(coords[:, 0], kind="stable")
+    coords = coords[order]
+    touching = np.zeros(len(coords), dtype=bool)
+    for i, (_, bottom, right, top) in enumerate(coords):
+        # Boxes sorted after i that start before its right edge overlap in x
+        end = np.searchsorted(coords[:, 0], right, side="right")
+        others = np.arange(i + 1, end)
+        hits = others[(coords[others, 1] <= top) & (coords[others, 3] >= bottom)]
+        if hits.size:
+            touching[i] = True
+            touching[hits] = True
+    result = np.empty_like(touching)
+    result[order] = touching
+    return result
+
+
+def _add_hierarchical_protection_mask(
+    final_component: gf.Component,
+    component: gf.Component,
+    protection_layer: LayerSpec,
+    component_layers: list[LayerSpec],
+    offset: float,
+    corner_radius: float | None,
+    max_deviation: float,
+) -> None:
+    """Adds the protection mask of a component to final_component per child cell.
+
+    Every unique child cell gets a cached mask cell that is placed with the
+    transformations of the original instances. Only the masks that could
+    merge with a neighbour, and the geometries drawn directly in the
+    component, are computed at the parent level.
+    """
+    dbu = component.kcl.dbu
+    layers = tuple(component_layers)
+    layer_indices = [gf.get_layer(layer) for layer in layers]
+
+    # Geometries drawn directly in the component are always handled here
+    local = gf.kdb.Region()
+    for layer_index in layer_indices:
+        local.insert(component.shapes(layer_index))
+
+    # One mask cell per unique child and one bounding box per placement
+    instances = []
+    placements = []
+    boxes = []
+    # Creating the mask cells changes the layout, so copy the instances first
+    cell_insts = [instance.cell_inst.dup() for instance in component.kdb_cell.each_inst()]
+    for cell_inst in cell_insts:
+        child = component.kcl[cell_inst.cell_index]
+        mask_cell = protection_mask(
+            component=child,
+            protection_layer=protection_layer,
+            component_layers=layers,
+            offset=offset,
+            corner_radius=corner_radius,
+            max_deviation=max_deviation,
+        )
+        if mask_cell.kdb_cell.bbox().empty():
+            continue
+        instances.append((cell_inst, mask_cell))
+        for trans in cell_inst.each_cplx_trans():
+            placements.append((len(instances) - 1, child, trans))
+            boxes.append(mask_cell.kdb_cell.bbox().transformed(trans))
+    if not local.is_empty():
+        boxes.append(local.bbox().enlarged(round(offset / dbu)))
+    touching = _touching_boxes(boxes)[: len(placements)]
+
+    # Isolated masks are placed as references, whole arrays at once if possible
+    touching_instances = {placements[i][0] for i in np.flatnonzero(touching)}
+    for i, (cell_inst, mask_cell) in enumerate(instances):
+        if i not in touching_instances:
+            cell_inst = cell_inst.dup()
+            cell_inst.cell_index = mask_cell.cell_index()
+            final_component.kdb_cell.insert(cell_inst)
+    for (i, _, trans), is_touching in zip(placements, touching):
+        if i in touching_instances and not is_touching:
+            final_component.kdb_cell.insert(
+                gf.kdb.CellInstArray(instances[i][1].cell_index(), trans)
+            )
+
+    # Merging masks are computed together from the original geometries
+    region = local
+    for (_, child, trans), is_touching in zip(placements, touching):
+        if is_touching:
+            for layer_index in layer_indices:
+                region.insert(
+                    gf.kdb.Region(child.begin_shapes_rec(layer_index)).transformed(
+                        trans
+                    )
+                )
+    if not region.is_empty():
+        region.size(round(offset / dbu))
+        if corner_radius is not None:
+            round_region(region, corner_radius, max_deviation=max_deviation, dbu=dbu)
+        final_component.add_polygon(region, layer=protection_layer)
+
 
-# @gf.cell
 def add_protection_mask(
     component: ComponentSpec,
     protection_layer: LayerSpec,
     component_layers: list[LayerSpec] = [],
     offset: int = 3,
     corner_radius: float | None = None,
+    hierarchical: bool = False,
+    max_deviation: float = 1,
+    tile_size: float | None = None,
+    threads: int | None = None,
 ) -> gf.Component:
     """Adds a protection mask to a component.
 
     The protection mask is a dilated version of the component geometries
-    on the specified protection layer.
+    on the specified protection layer. The original component is placed as a
+    reference, so its hierarchy is kept intact.
 
-    .. attention::
-        This method uses :meth:`flatten()` to merge the geometries, which may
-        result in loss of hierarchy or segmentation errors. Make sure to perform this
-        operation only on components that are suitable for flattening.
+    In hierarchical mode the mask is computed once per unique child cell and
+    placed through the existing references, which keeps the output small for
+    components with many identical instances. Masks that would merge with a
+    neighbour are computed at the parent level, so the result is the same.
 
     Parameters
     ----------
@@ -32,6 +250,14 @@ def add_protection_mask(
         The distance by which the protection mask will be dilated.
     corner_radius: float | None
         The radius of the corners of the protection mask. If None, corners will not be rounded.
+    hierarchical: bool
+        If True, the mask is computed per unique child cell instead of over the flattened component.
+    max_deviation: float
+        Maximum distance between the rounded corners and the ideal arcs in nm.
+    tile_size: float | None
+        If given, the flat mask is computed in parallel tiles of this size in um.
+    threads: int | None
+        The number of threads used for tiling, defaults to the number of CPUs.
 
     Returns
     -------
@@ -41,55 +267,37 @@ def add_protection_mask(
     # Get the specs in the right format
     if not isinstance(component, gf.Component):
         component = gf.get_component(component)
-    if not isinstance(protection_layer, (list, tuple)):
-        protection_layer = gf.get_layer_tuple(protection_layer)
-
     if not isinstance(component_layers, (tuple, list)):
-        # Layers are fiven as strings, convert them to tuples
         component_layers = [component_layers]
 
-        for layer in component_layers:
-            if not isinstance(layer, (list, tuple)):
-                layer = gf.get_layer_tuple(layer)
+    # Existing geometries on the protection layer are merged into the mask
+    component_layers = [*component_layers, protection_layer]
 
-    elif not all(isinstance(layer, (list, tuple)) for layer in component_layers):
-        # Layers are fiven as strings, convert them to tuples
-        component_layers = [gf.get_layer_tuple(layer) for layer in component_layers]
-
-    # Create a copy to use as a template
-    temp = gf.Component()
-    temp << component.copy()
-    temp.flatten()
-
-    # Remap every geometry to the protection layer
-    mapping = {layer: protection_layer for layer in component_layers}
-    temp.remap_layers(mapping, recursive=True)
-
-    # Merge the geometries with the protection layer and dillate the component
-    temp.flatten()
-    temp.offset(
-        distance=offset,
-        layer=protection_layer,
-    )
-
-    # Round the corners if specified
-    if corner_radius is not None:
-        rounded_temp = gf.Component()
-        for p in temp.get_polygons(by="tuple", layers=[protection_layer])[
-            protection_layer
-        ]:
-            p_round = p.round_corners(corner_radius, corner_radius * 1e3, 600)
-            rounded_temp.add_polygon(p_round, layer=protection_layer)
-        temp = rounded_temp
-
-    # Create a new component and combine the original component with the protection mask
+    # Combine the original component with the protection mask
     final_component = gf.Component()
     final_component << component
-    final_component << temp
-    final_component.flatten()
-    final_component.add_ports(
-        component.ports,
-    )
+    if hierarchical:
+        _add_hierarchical_protection_mask(
+            final_component=final_component,
+            component=component,
+            protection_layer=protection_layer,
+            component_layers=component_layers,
+            offset=offset,
+            corner_radius=corner_radius,
+            max_deviation=max_deviation,
+        )
+    else:
+        mask = get_protection_mask_region(
+            component=component,
+            component_layers=component_layers,
+            offset=offset,
+            corner_radius=corner_radius,
+            max_deviation=max_deviation,
+            tile_size=tile_size,
+            threads=threads,
+        )
+        final_component.add_polygon(mask, layer=protection_layer)
+    final_component.add_ports(component.ports)
     return final_component
 
 
@@ -1,16 +1,22 @@
 import gdsfactory as gf
 from gdsfactory.typings import ComponentSpec, CrossSectionSpec
-from gdsfactory.components.spirals.spiral_heater import (
-    _req_straight_len,
-)
 from gdsfactory.components.bends.bend_s import get_min_sbend_size
+from gdsfactory.serialization import clean_value_json
+import kfactory as kf
+from kfactory.routing.manhattan import route_manhattan
+from kfactory.routing.steps import Straight
 import numpy as np
 from functools import partial
-from scipy.interpolate import interp1d
+from typing import Callable
+
+from ...cache import cache_key, load_arrays, save_arrays
 
 
 spiral_racetrack = partial(gf.components.spiral_racetrack, cross_section="asic_routing")
 
+# Allowed error of the total length of a fixed length spiral in um
+_LENGTH_TOLERANCE = 1e-3
+
 
 @gf.cell
 def spiral_racetrack_fixed_length(
@@ -139,9 +145,289 @@ def spiral_racetrack_fixed_length(
     )
     c.add_port("o1", port=in_wg.ports["o2"])
     c.info["length"] += c.kcl.dbu * route.length
+    if abs(c.info["length"] - length) > _LENGTH_TOLERANCE:
+        raise ValueError(
+            f"The spiral is {c.info['length']:.3f} um long instead of {length} um."
+        )
     return c
 
 
+@gf.cell
+def spiral_racetrack_fixed_length_array(
+    lengths: tuple[float, ...] = (900, 1000, 1200),
+    spacing: float = 10,
+    in_out_port_spacing: float = 150,
+    n_straight_sections: int = 8,
+    min_radius: float | None = None,
+    min_spacing: float = 5.0,
+    straight: ComponentSpec = "straight",
+    bend: ComponentSpec = "bend_circular",
+    bend_s: ComponentSpec = "bend_s",
+    cross_section: CrossSectionSpec = "strip",
+    cross_section_s: CrossSectionSpec | None = None,
+) -> gf.Component:
+    """Returns a column of racetrack spirals with the given total lengths.
+
+    All spirals share one length calibration and the same bend cells, and
+    are placed as references in a single component. The spirals are stacked
+    in y with their input ports aligned at x = 0. The lengths of the spirals
+    are stored in info["lengths"] and the requested ones in
+    info["target_lengths"].
+
+    Args:
+        lengths: total lengths of the spirals in um.
+        spacing: spacing between the bounding boxes of neighbouring spirals in um.
+        in_out_port_spacing: spacing between input and output ports of the spirals in um.
+        n_straight_sections: total number of straight sections for the racetrack spirals. Has to be even.
+        min_radius: smallest radius in um.
+        min_spacing: minimum center-center spacing between adjacent waveguides.
+        straight: factory to generate the straight segments.
+        bend: factory to generate the bend segments.
+        bend_s: factory to generate the s-bend segments.
+        cross_section: cross-section of the waveguides.
+        cross_section_s: cross-section of the s bend waveguide (optional).
+    """
+    c = gf.Component()
+    y = 0.0
+    achieved = []
+    for i, length in enumerate(lengths):
+        spiral = c << spiral_racetrack_fixed_length(
+            length=length,
+            in_out_port_spacing=in_out_port_spacing,
+            n_straight_sections=n_straight_sections,
+            min_radius=min_radius,
+            min_spacing=min_spacing,
+            straight=straight,
+            bend=bend,
+            bend_s=bend_s,
+            cross_section=cross_section,
+            cross_section_s=cross_section_s,
+        )
+        spiral.dmove((-spiral.ports["o1"].x, y - spiral.ymin))
+        y = spiral.ymax + spacing
+        c.add_port(f"o1_{i}", port=spiral.ports["o1"])
+        c.add_port(f"o2_{i}", port=spiral.ports["o2"])
+        achieved.append(float(spiral.cell.info["length"]))
+
+    c.info["lengths"] = achieved
+    c.info["target_lengths"] = [float(length) for length in lengths]
+    return c
+
+
+def _sbend_length(
+    dx: float | np.ndarray, dy: float, npoints: int = 99
+) -> float | np.ndarray:
+    """Returns the length of the bezier s-bend drawn by bend_s.
+
+    The s-bend is the cubic bezier curve with control points (0, 0),
+    (dx/2, 0), (dx/2, dy) and (dx, dy), sampled at npoints points.
+    """
+    dx = np.asarray(dx, dtype=float)
+    t = np.linspace(0, 1, npoints)
+    x = dx[..., None] * (1.5 * t * (1 - t) + t**3)
+    y = dy * (3 * t**2 - 2 * t**3)
+    length = np.hypot(np.diff(x, axis=-1), np.diff(y)).sum(axis=-1)
+    return float(length) if length.ndim == 0 else length
+
+
+def _spiral_reference(
+    straight_length: float,
+    in_out_port_spacing: float = 100,
+    min_radius: float | None = None,
+    spacings: tuple[float] = (1.0, 1.0),
+    straight: ComponentSpec = "straight",
+    bend: ComponentSpec = "bend_euler",
+    bend_s: ComponentSpec = "bend_s",
+    cross_section: CrossSectionSpec = "strip",
+    cross_section_s_bend: CrossSectionSpec = "strip",
+) -> dict[str, np.ndarray]:
+    """Measures the parts of a spiral that the length model cannot derive.
+
+    This builds one spiral and routes its output, placed as in
+    spiral_racetrack_fixed_length. It returns the length of the bends of the
+    spiral, the length of the input waveguide, the output port of the spiral
+    and the end of the route relative to the input port (in dbu), and the
+    length of a 90 degree bend of the route as measured by the route.
+    """
+    c = gf.Component()
+
+    _spiral = spiral_racetrack(
+        min_radius=min_radius,
+        straight_length=straight_length,
+        spacings=spacings,
+        straight=straight,
+        bend=bend,
+        bend_s=bend_s,
+        cross_section=cross_section,
+        cross_section_s=cross_section_s_bend,
+        extra_90_deg_bend=True,
+    )
+    spiral = c << _spiral
+    if spiral.ports["o1"].x > spiral.ports["o2"].x:
+        spiral.mirror_x()
+
+    c.add_port(
+        "o2",
+        center=(
+            spiral.ports["o1"].x + in_out_port_spacing,
+            spiral.ports["o1"].y,
+        ),
+        orientation=180,
+        cross_section=gf.get_cross_section(cross_section_s_bend),
+    )
+    route = gf.routing.route_single(
+        c,
+        spiral.ports["o2"],
+        c.ports["o2"],
+        straight=straight,
+        bend=bend,
+        cross_section=cross_section_s_bend,
+        radius=min_radius,
+    )
+
+    # Everything but the straights and the s-bend of the spiral
+    bends = (
+        _spiral.info["length"]
+        - 2 * len(spacings) * straight_length
+        - _sbend_info_length(straight_length, -min_radius * 2 + spacings[0])
+    )
+    origin = spiral.ports["o1"].to_itype().trans.disp
+    start = spiral.ports["o2"].to_itype().trans
+    end = c.ports["o2"].to_itype().trans
+    radius = _bend90_radius(bend, cross_section_s_bend, min_radius)
+    points = _route_backbone(start, end, radius)
+    # The route measures its length by area, so a bend is not exactly
+    # as long as its info says
+    n_bends = len(points) - 2
+    bend90 = (
+        route.length - _backbone_length(points) + 2 * n_bends * radius
+    ) / n_bends
+    return {
+        "straight_length": np.array(straight_length),
+        "bends": np.array(bends),
+        "input": np.array(spiral.ports["o1"].x - spiral.xmin),
+        "start": np.array(
+            [start.disp.x - origin.x, start.disp.y - origin.y, start.angle]
+        ),
+        "end": np.array([end.disp.x - origin.x, end.disp.y - origin.y, end.angle]),
+        "radius": np.array(radius),
+        "bend90": np.array(bend90),
+    }
+
+
+def _sbend_info_length(dx: float, dy: float) -> float:
+    """Returns the length bend_s stores in its info, rounded to 3 decimals."""
+    return round(_sbend_length(dx, dy), 3)
+
+
+def _bend90_radius(
+    bend: ComponentSpec, cross_section: CrossSectionSpec, radius: float
+) -> int:
+    """Returns the size of the route bends in dbu as the router sees it."""
+    bend90 = gf.get_component(bend, cross_section=cross_section, radius=radius)
+    p1, p2 = (port.to_itype().trans.disp for port in bend90.ports)
+    return max(abs(p2.x - p1.x), abs(p2.y - p1.y))
+
+
+def _route_backbone(start: kf.kdb.Trans, end: kf.kdb.Trans, radius: int) -> list:
+    """Returns the backbone of the route_single route between two ports."""
+    return route_manhattan(
+        start,
+        end,
+        bend90_radius=radius,
+        start_steps=[Straight(dist=0)],
+        end_steps=[Straight(dist=0)],
+    )
+
+
+def _backbone_length(points: list) -> int:
+    return sum(int((b - a).length()) for a, b in zip(points[:-1], points[1:]))
+
+
+# Persistent cache version of the reference measurement
+_REFERENCE_VERSION = 1
+# Number of straight lengths on which the route shape is sampled before the
+# changes of shape are bisected down to one dbu
+_SHAPE_SAMPLES = 65
+# Reference measurements per spiral configuration
+_REFERENCES: dict[str, dict[str, np.ndarray]] = {}
+
+
+def _reference_key(
+    in_out_port_spacing: float,
+    min_radius: float,
+    spacings: tuple[float],
+    straight: ComponentSpec,
+    bend: ComponentSpec,
+    bend_s: ComponentSpec,
+    cross_section: CrossSectionSpec,
+    cross_section_s_bend: CrossSectionSpec,
+) -> str:
+    """Returns the cache key of the reference measurement of a spiral.
+
+    The key contains everything the measurement depends on, including the
+    active PDK and the gdsfactory version that draw the bends and routes.
+    """
+    pdk = gf.get_active_pdk()
+    return cache_key(
+        "spiral_racetrack",
+        _REFERENCE_VERSION,
+        gf.__version__,
+        pdk.name,
+        getattr(pdk, "version", None),
+        float(in_out_port_spacing),
+        float(min_radius),
+        [float(spacing) for spacing in spacings],
+        clean_value_json(straight),
+        clean_value_json(bend),
+        clean_value_json(bend_s),
+        clean_value_json(gf.get_cross_section(cross_section)),
+        clean_value_json(gf.get_cross_section(cross_section_s_bend)),
+    )
+
+
+def _spiral_length_model(
+    reference: dict[str, np.ndarray], n_straights: int, sbend_dy: float
+) -> Callable[[float], tuple[float, tuple]]:
+    """Returns the total spiral length as a function of the straight length.
+
+    The spiral is the s-bend, n_straights straights and bends that do not
+    depend on the straight length. The input waveguide does not depend on it
+    either. The output port of the spiral moves by the straight length
+    relative to the input port, and the route to the output is computed with
+    the router of route_single. The function also returns the shape of the
+    route, the length is continuous as long as the shape does not change.
+    """
+    dbu = gf.kcl.dbu
+    x0 = float(reference["straight_length"])
+    constant = float(reference["bends"] + reference["input"])
+    start_x, start_y, start_angle = (int(v) for v in reference["start"])
+    end_x, end_y, end_angle = (int(v) for v in reference["end"])
+    end = kf.kdb.Trans(end_angle, False, end_x, end_y)
+    radius = int(reference["radius"])
+    bend90 = float(reference["bend90"])
+
+    def total_length(straight_length: float) -> tuple[float, tuple]:
+        shift = round((straight_length - x0) / dbu)
+        start = kf.kdb.Trans(start_angle, False, start_x + shift, start_y)
+        points = _route_backbone(start, end, radius)
+        n_bends = len(points) - 2
+        route = _backbone_length(points) - 2 * n_bends * radius + n_bends * bend90
+        length = (
+            constant
+            + n_straights * straight_length
+            + _sbend_info_length(straight_length, sbend_dy)
+            + dbu * route
+        )
+        shape = tuple(
+            (np.sign(b.x - a.x), np.sign(b.y - a.y))
+            for a, b in zip(points[:-1], points[1:])
+        )
+        return length, shape
+
+    return total_length
+
+
 def _req_straight_len(
     length: float = 1000,
     in_out_port_spacing: float = 100,
@@ -152,8 +438,25 @@ def _req_straight_len(
     bend_s: ComponentSpec = "bend_s",
     cross_section: CrossSectionSpec = "strip",
     cross_section_s_bend: CrossSectionSpec = "strip",
+    tolerance: float = _LENGTH_TOLERANCE,
 ) -> float:
-    """Returns geometrical parameters to make a spiral of a given length.
+    """Returns the straight length that gives a spiral of a given total length.
+
+    The total length is the length of the inner s-bend, the straights, the
+    bends, the input waveguide and the output route. The s-bend and the
+    straights are evaluated analytically and the route is computed with the
+    router of route_single, without placing it. The bends and the input
+    waveguide do not depend on the straight length, they are measured once
+    on a reference spiral together with the ports of the route.
+
+    The output route changes shape at some straight lengths, which makes the
+    total length jump. These changes are located to one dbu and the length
+    is solved by bisection between them. Lengths that fall into a jump raise
+    a ValueError that lists the lengths that can be reached.
+
+    The reference is cached in memory and on disk, keyed on the spiral
+    settings, the active PDK and the gdsfactory version, so later calls do
+    not build any component.
 
     Args:
         length: total length of the spiral from input to output ports in um.
@@ -164,70 +467,110 @@ def _req_straight_len(
         bend_s: factory to generate the s-bend segments.
         cross_section: cross-section of the waveguides.
         cross_section_s_bend: s bend cross section
+        tolerance: allowed error of the total length in um.
     """
     xs = gf.get_cross_section(cross_section)
     min_radius = min_radius or xs.radius
     assert min_radius
-
-    # "Brute force" approach - sweep length and save total length
-    lens: list[float] = []
+    sbend_dy = -min_radius * 2 + 1 * spacings[0]
+    dbu = gf.kcl.dbu
 
     # Figure out the min straight for the spiral so that the inner
     # s bend has min radius within the bend radius of the waveguide
-    min_straigth_length = get_min_sbend_size(
-        (None, -min_radius * 2 + 1 * spacings[0]), cross_section_s_bend
-    )
+    min_straigth_length = get_min_sbend_size((None, sbend_dy), cross_section_s_bend)
 
     if min_straigth_length > 0.8 * in_out_port_spacing:
         raise ValueError(
             "The maximum straight length makes the inner s bend too tight. Increase the in-out port spacing."
         )
+    bounds = (
+        np.ceil(min_straigth_length / dbu) * dbu,
+        np.floor(0.9 * in_out_port_spacing / dbu) * dbu,
+    )
 
-    straight_lengths = np.linspace(min_straigth_length, 0.9 * in_out_port_spacing, 100)
-
-    for str_len in straight_lengths:
-        c = gf.Component()
+    key = _reference_key(
+        in_out_port_spacing=in_out_port_spacing,
+        min_radius=min_radius,
+        spacings=spacings,
+        straight=straight,
+        bend=bend,
+        bend_s=bend_s,
+        cross_section=cross_section,
+        cross_section_s_bend=cross_section_s_bend,
+    )
+    if key not in _REFERENCES:
+        reference = load_arrays("spiral_racetrack", key)
+        if reference is None:
+            reference = _spiral_reference(
+                straight_length=float(bounds[0]),
+                in_out_port_spacing=in_out_port_spacing,
+                min_radius=min_radius,
+                spacings=spacings,
+                straight=straight,
+                bend=bend,
+                bend_s=bend_s,
+                cross_section=cross_section,
+                cross_section_s_bend=cross_section_s_bend,
+            )
+            save_arrays("spiral_racetrack", key, **reference)
+        _REFERENCES[key] = reference
+    total_length = _spiral_length_model(
+        _REFERENCES[key], 2 * len(spacings), sbend_dy
+    )
 
-        _spiral = spiral_racetrack(
-            min_radius=min_radius,
-            straight_length=str_len,
-            spacings=spacings,
-            straight=straight,
-            bend=bend,
-            bend_s=bend_s,
-            cross_section=cross_section,
-            cross_section_s=cross_section_s_bend,
-            extra_90_deg_bend=True,
-        )
-        spiral = c << _spiral
-        c.info["length"] = _spiral.info["length"]
-
-        if spiral.ports["o1"].x > spiral.ports["o2"].x:
-            spiral.mirror_x()
-
-        c.info["length"] += spiral.ports["o1"].x - spiral.xmin
-
-        c.add_port(
-            "o2",
-            center=(
-                spiral.ports["o1"].x + in_out_port_spacing,
-                spiral.ports["o1"].y,
-            ),
-            orientation=180,
-            cross_section=gf.get_cross_section(cross_section_s_bend),
+    # Split the straight lengths into the ranges in which the route keeps
+    # its shape, the changes are bisected down to one dbu
+    samples = np.linspace(*bounds, _SHAPE_SAMPLES)
+    shapes = [total_length(x)[1] for x in samples]
+    pieces = [[float(samples[0])]]
+    for i in range(len(samples) - 1):
+        a, b = samples[i], samples[i + 1]
+        if shapes[i] != shapes[i + 1]:
+            shape_a = shapes[i]
+            while b - a > 1.5 * dbu:
+                c = round((a + b) / 2 / dbu) * dbu
+                if total_length(c)[1] == shape_a:
+                    a = c
+                else:
+                    b = c
+            pieces[-1].append(float(a))
+            pieces.append([float(b)])
+    pieces[-1].append(float(samples[-1]))
+
+    ranges = [(total_length(a)[0], total_length(b)[0]) for a, b in pieces]
+    piece = next(
+        (
+            i
+            for i, (la, lb) in enumerate(ranges)
+            if min(la, lb) <= length <= max(la, lb)
+        ),
+        None,
+    )
+    if piece is None:
+        reachable = ", ".join(
+            f"{min(la, lb):.3f} to {max(la, lb):.3f}" for la, lb in ranges
         )
-        route = gf.routing.route_single(
-            c,
-            spiral.ports["o2"],
-            c.ports["o2"],
-            straight=straight,
-            bend=bend,
-            cross_section=cross_section_s_bend,
-            radius=min_radius,
+        raise ValueError(
+            f"A length of {length} um cannot be reached, the spiral can be "
+            f"{reachable} um long."
         )
-        c.info["length"] += c.kcl.dbu * route.length
-        lens.append(c.info["length"])
 
-    # get the required spacing to achieve the required length (interpolate)
-    f = interp1d(lens, straight_lengths)
-    return float(f(length))
+    # The length increases with the straight length within a piece
+    a, b = pieces[piece]
+    if ranges[piece][0] > ranges[piece][1]:
+        a, b = b, a
+    while abs(b - a) > 1e-9:
+        c = (a + b) / 2
+        if total_length(c)[0] < length:
+            a = c
+        else:
+            b = c
+    straight_length = min((a, b), key=lambda x: abs(total_length(x)[0] - length))
+
+    error = total_length(straight_length)[0] - length
+    if abs(error) > tolerance:
+        raise ValueError(
+            f"Could not find a spiral of {length} um within {tolerance} um, the "
+            f"closest one found is {error + length:.3f} um long."
+        )
+    return float(straight_length)
@@ -0,0 +1,102 @@
+import gdsfactory as gf
+import numpy as np
+from gdsfactory.typings import LayerSpec
+
+from .sampling import chord_npoints
+
+
+def round_region(
+    region: gf.kdb.Region,
+    radius: float,
+    inner_radius: float = 0,
+    max_deviation: float = 1,
+    dbu: float = 1e-3,
+) -> gf.kdb.Region:
+    """Rounds the corners of all polygons in a region in one call.
+
+    The number of points per corner follows from the chord tolerance, so
+    small radii get few vertices and no vertex is placed finer than the
+    lithography can resolve.
+
+    Parameters
+    ----------
+    region: gf.kdb.Region
+        The region to round, in database units. It is modified in place.
+    radius: float
+        The radius of the outer (convex) corners in um.
+    inner_radius: float
+        The radius of the inner (concave) corners in um. 0 keeps them sharp.
+    max_deviation: float
+        Maximum distance between the rounded corners and the ideal arcs in nm.
+    dbu: float
+        The database unit of the region in um.
+
+    Returns
+    -------
+    gf.kdb.Region
+        The rounded region.
+    """
+    num_points = corner_npoints(radius, inner_radius, max_deviation)
+    region.round_corners(inner_radius / dbu, radius / dbu, num_points)
+    return region
+
+
+def corner_npoints(radius: float, inner_radius: float, max_deviation: float) -> int:
+    """Returns the number of points per full circle used to round corners."""
+    return max(chord_npoints(max(radius, inner_radius), max_deviation), 4)
+
+
+@gf.cell
+def rounded_rectangle(
+    size: tuple[float, float] = (4, 2),
+    radius: float = 0.5,
+    layer: LayerSpec = "WG",
+    max_deviation: float = 1,
+    centered: bool = False,
+) -> gf.Component:
+    """Returns a rectangle with rounded corners drawn from analytic arcs.
+
+    Parameters
+    ----------
+    size: tuple[float, float]
+        Width and height of the rectangle.
+    radius: float
+        The radius of the corners, limited to half the smallest side.
+    layer: LayerSpec
+        The layer of the rectangle.
+    max_deviation: float
+        Maximum distance between the rounded corners and the ideal arcs in nm.
+    centered: bool
+        If True, the rectangle is centered at (0, 0), otherwise its lower
+        left corner is at (0, 0).
+    """
+    width, height = size
+    radius = min(radius, width / 2, height / 2)
+
+    c = gf.Component()
+    if radius <= 0:
+        points = np.array([(0, 0), (width, 0), (width, height), (0, height)])
+    else:
+        # One quarter arc per corner, counter clockwise from the lower right
+        n = chord_npoints(radius, max_deviation, angle=90)
+        t = np.linspace(0, np.pi / 2, n + 1)
+        centers = np.array(
+            [
+                (width - radius, radius),
+                (width - radius, height - radius),
+                (radius, height - radius),
+                (radius, radius),
+            ]
+        )
+        angles = t[None, :] + (np.arange(4)[:, None] - 1) * np.pi / 2
+        points = np.stack(
+            [
+                centers[:, 0:1] + radius * np.cos(angles),
+                centers[:, 1:2] + radius * np.sin(angles),
+            ],
+            axis=-1,
+        ).reshape(-1, 2)
+    if centered:
+        points = points - np.array([width, height]) / 2
+    c.add_polygon(points, layer=layer)
+    return c
@@ -0,0 +1,177 @@
+"""Helpers to discretise smooth curves with a bounded geometric error."""
+
+import warnings
+
+import gdsfactory as gf
+import numpy as np
+
+
+def get_arc_tolerance(default: float = 1) -> float:
+    """Returns the maximum deviation of discretised arcs in nm for the active PDK.
+
+    PDKs set it with the ``arc_tolerance`` constant, ``default`` is used if
+    the active PDK does not define it.
+    """
+    return float(gf.get_active_pdk().constants.get("arc_tolerance", default))
+
+
+def sample_by_deviation(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_deviation: float,
+    max_points: int | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Resamples a densely sampled curve with vertices placed by curvature.
+
+    A chord of length ``L`` on a curve with curvature ``k`` deviates roughly
+    ``k * L**2 / 8`` from the curve, so the local vertex spacing is chosen as
+    ``sqrt(8 * max_deviation / k)``. Flat parts of the curve get few vertices
+    and tightly curved parts get many. Chords that still deviate too much
+    from the dense curve are split afterwards. The end points are always kept.
+
+    If the tolerance needs more than ``max_points`` vertices, ``max_points``
+    vertices are placed with the same curvature based spacing instead. A
+    warning with the deviation that is reached is issued if it exceeds
+    ``max_deviation``.
+
+    Parameters
+    ----------
+    x: np.ndarray
+        Dense x coordinates of the curve in um.
+    y: np.ndarray
+        Dense y coordinates of the curve in um.
+    max_deviation: float
+        Maximum distance between the curve and the resampled polygon in nm.
+    max_points: int | None
+        Maximum number of vertices, no limit if None.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The x and y coordinates of the resampled curve.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if max_deviation <= 0:
+        raise ValueError(f"max_deviation must be positive, got {max_deviation}")
+    tolerance = max_deviation * 1e-3
+
+    # Arc length along the dense curve
+    s = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+    if s[-1] == 0:
+        return x[[0, -1]], y[[0, -1]]
+
+    # Curvature from the derivatives with respect to the arc length
+    dx = np.gradient(x, s)
+    dy = np.gradient(y, s)
+    ddx = np.gradient(dx, s)
+    ddy = np.gradient(dy, s)
+    curvature = np.abs(dx * ddy - dy * ddx) / np.maximum(
+        (dx**2 + dy**2) ** 1.5, 1e-30
+    )
+
+    # Integrate the required vertex density along the curve, the small floor
+    # keeps the integral strictly increasing on perfectly straight parts
+    density = np.sqrt(curvature / (8 * tolerance)) + 1e-9
+    segments = np.concatenate(
+        ([0.0], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(s)))
+    )
+    num_segments = max(int(np.ceil(segments[-1])), 1)
+
+    def place(num_segments: int) -> np.ndarray:
+        # Place the vertices at equal steps of the integrated density
+        targets = np.linspace(0, segments[-1], num_segments + 1)
+        return np.unique(
+            np.round(np.interp(targets, segments, np.arange(len(s)))).astype(int)
+        )
+
+    points = np.arange(len(s))
+
+    def worst_deviation(indices: np.ndarray) -> np.ndarray:
+        # The largest distance between each chord and the dense curve
+        segment = np.minimum(
+            np.searchsorted(indices, points, side="right") - 1, len(indices) - 2
+        )
+        start, end = indices[segment], indices[segment + 1]
+        chord_x, chord_y = x[end] - x[start], y[end] - y[start]
+        distance = np.abs(
+            (x - x[start]) * chord_y - (y - y[start]) * chord_x
+        ) / np.maximum(np.hypot(chord_x, chord_y), 1e-30)
+        return np.maximum.reduceat(distance, indices[:-1])
+
+    def capped() -> tuple[np.ndarray, np.ndarray]:
+        indices = place(max(max_points - 1, 1))
+        deviation = worst_deviation(indices).max()
+        if deviation > tolerance:
+            warnings.warn(
+                f"A max_deviation of {max_deviation} nm needs more than "
+                f"max_points={max_points} vertices, the curve deviates up to "
+                f"{deviation * 1e3:.3g} nm from the polygon.",
+                stacklevel=3,
+            )
+        return x[indices], y[indices]
+
+    if max_points is not None and num_segments >= max_points:
+        return capped()
+    indices = place(num_segments)
+
+    # The curvature estimate is local, so split any chord that still deviates
+    # too much from the dense curve until all of them are within tolerance
+    while True:
+        worst = worst_deviation(indices)
+        too_far = np.flatnonzero(worst > tolerance)
+        splits = (indices[too_far] + indices[too_far + 1]) // 2
+        splits = splits[splits > indices[too_far]]
+        if not splits.size:
+            break
+        indices = np.union1d(indices, splits)
+
+    if max_points is not None and len(indices) > max_points:
+        return capped()
+    return x[indices], y[indices]
+
+
+def chord_npoints(
+    radius: float | np.ndarray,
+    max_deviation: float,
+    angle: float = 360,
+) -> int | np.ndarray:
+    """Returns the number of chords needed to draw an arc within a tolerance.
+
+    A chord spanning an angle ``t`` on a circle with radius ``r`` deviates
+    ``r * (1 - cos(t / 2))`` from the arc, which gives the largest angle per
+    chord that stays within ``max_deviation``.
+
+    Parameters
+    ----------
+    radius: float | np.ndarray
+        Radius of the arc in um.
+    max_deviation: float
+        Maximum distance between the arc and the chords in nm.
+    angle: float
+        Angle spanned by the arc in degrees.
+
+    Returns
+    -------
+    int | np.ndarray
+        The number of chords, at least one.
+    """
+    if max_deviation <= 0:
+        raise ValueError(f"max_deviation must be positive, got {max_deviation}")
+    radius = np.asarray(radius, dtype=float)
+    ratio = np.clip(max_deviation * 1e-3 / np.maximum(radius, 1e-30), 0, 1)
+    step = 2 * np.arccos(1 - ratio)
+    n = np.maximum(np.ceil(np.radians(abs(angle)) / step), 1).astype(int)
+    return int(n) if n.ndim == 0 else n
+
+
+def polygons_to_region(polygons: np.ndarray, dbu: float) -> gf.kdb.Region:
+    """Snaps a stack of polygons in um to the grid and returns them as one region."""
+    points = np.round(np.asarray(polygons) / dbu).astype(np.int64).tolist()
+    # Parsing the string form is much faster than creating every Point object
+    region = gf.kdb.Region()
+    for p in points:
+        region.insert(
+            gf.kdb.Polygon.from_s("(" + ";".join(f"{x},{y}" for x, y in p) + ")")
+        )
+    return region
@@ -3,8 +3,11 @@ import gdsfactory as gf
 from gdsfactory import Component
 from gdsfactory.typings import LayerSpec, CrossSectionSpec, Port
 from gdsfactory.cross_section import port_names_electrical, port_types_electrical
+import json
 from functools import partial
 
+from .negative_tone import extrude_sections
+
 # taper = partial(gf.components.taper)
 # from gdsfactory.components import taper
 
@@ -13,7 +16,6 @@ optical_taper = taper
 electrical_taper = partial(gf.components.taper_electrical, cross_section="nbtin")
 
 
-@gf.cell
 def sine_taper(
     length: float = 10.0,
     width1: float = 0.5,
@@ -22,11 +24,104 @@ def sine_taper(
     npoints=100,
     **kwargs,
 ) -> gf.Component:
+    """Returns a transition between two widths of the same cross section.
+
+    The transitions are cached per cross section name, widths, length and
+    number of points, so every taper with the same geometry is a reference
+    to one shared cell, regardless of how the cross section was passed.
+
+    Parameters
+    ----------
+    length: float
+        Length of the taper.
+    width1: float
+        Width at the start of the taper.
+    width2: float | None
+        Width at the end of the taper, defaults to width1.
+    cross_section: CrossSectionSpec
+        The cross section of the taper, only its name is used.
+    npoints: int
+        Number of points along the taper.
+    """
     # IMPORTANT
     # This method only works if we use the str version of the cross_section.
     # no idea why, but it does not work with the CrossSection object, it ignores the second width
-    if not isinstance(cross_section, str):
-        cross_section = cross_section.name
+    cross_section = _cross_section_name(cross_section)
+    if width2 is None:
+        width2 = width1
+    return _transition_taper(
+        cross_section=cross_section,
+        width1=gf.snap.snap_to_grid2x(width1),
+        width2=gf.snap.snap_to_grid2x(width2),
+        length=gf.snap.snap_to_grid(length),
+        npoints=npoints,
+    )
+
+
+# Registered cross section names per PDK, keyed on _width_independent_key
+_CROSS_SECTION_NAMES: dict[str, dict[str, str]] = {}
+
+
+def _width_independent_key(xs: gf.CrossSection) -> str:
+    """Returns a key that is the same for a cross section at every width.
+
+    The widths of the sections are stored relative to the main width, which
+    matches cladding sections that are offset from the core.
+    """
+    data = xs.model_dump()
+    for section in data.get("sections", []):
+        section["width"] = round(section["width"] - xs.width, 9)
+    return json.dumps(data, sort_keys=True, default=str)
+
+
+def _cross_section_names(pdk: gf.Pdk) -> dict[str, str]:
+    """Returns the width-independent keys of the cross sections of a PDK."""
+    names: dict[str, str] = {}
+    for name in pdk.cross_sections:
+        try:
+            key = _width_independent_key(gf.get_cross_section(name))
+        except TypeError:
+            # Cross sections that cannot be built without arguments
+            continue
+        names.setdefault(key, name)
+    return names
+
+
+def _cross_section_name(cross_section: CrossSectionSpec) -> str:
+    """Returns the name under which the active PDK registers a cross section.
+
+    The lookup table is built once per PDK, so resolving a cross section
+    does not scan all cross sections of the PDK. On a miss the table is
+    rebuilt once, which picks up cross sections registered after it was
+    built.
+    """
+    if isinstance(cross_section, str):
+        return cross_section
+    xs = gf.get_cross_section(cross_section)
+    pdk = gf.get_active_pdk()
+    key = _width_independent_key(xs)
+
+    def lookup() -> str | None:
+        name = _CROSS_SECTION_NAMES[pdk.name].get(key)
+        if name is not None and gf.get_cross_section(name, width=xs.width) == xs:
+            return name
+        return None
+
+    name = lookup() if pdk.name in _CROSS_SECTION_NAMES else None
+    if name is None:
+        _CROSS_SECTION_NAMES[pdk.name] = _cross_section_names(pdk)
+        name = lookup()
+    return name if name is not None else xs.name
+
+
+@gf.cell(basename="sine_taper")
+def _transition_taper(
+    cross_section: str,
+    width1: float,
+    width2: float,
+    length: float,
+    npoints: int,
+) -> gf.Component:
     cs1 = gf.get_cross_section(cross_section, width=width1)
     cs2 = gf.get_cross_section(cross_section, width=width2)
 
@@ -88,62 +183,12 @@ def neg_taper(
 
     width2 = width2 or width1
     c = gf.Component()
-    y1 = width1 / 2
-    y2 = width2 / 2
-
     if length:
-        mp1 = gf.kdb.DPolygon(
-            [
-                gf.kdb.DPoint(0, y1),
-                gf.kdb.DPoint(length, y2),
-                gf.kdb.DPoint(length, -y2),
-                gf.kdb.DPoint(0, -y1),
-            ]
-        )
-        # c.add_polygon(p1, layer=layer)
-
-        s0_width = 0  # x.sections[0].width
-        polies = []
-        for section in x.sections[1:3]:
-            delta_width = abs(section.width - s0_width)
-            y1 = (width1 + delta_width) / 2
-            y2 = (width2 + delta_width) / 2
-            polies.append(
-                gf.kdb.DPolygon(
-                    [
-                        gf.kdb.DPoint(0, y1),
-                        gf.kdb.DPoint(length, y2),
-                        gf.kdb.DPoint(length, -y2),
-                        gf.kdb.DPoint(0, -y1),
-                    ]
-                )
-            )
-            # c.add_polygon(p1, layer=section.layer)
-
-        p1: gf.kdb.DPolygon = polies.pop(0)
-        p2: gf.kdb.DPolygon = polies.pop(0)
-        r0 = gf.Region(mp1.to_itype(gf.kcl.dbu))
-        r1 = gf.Region(p1.to_itype(gf.kcl.dbu))
-        r2 = gf.Region(p2.to_itype(gf.kcl.dbu))
-        r3 = r1 + r2
-        r4 = r3 - r0
-        c.add_polygon(r4, layer=layer)
-
-        for section in x.sections[3:]:
-            delta_width = abs(section.width - s0_width)
-            y1 = (width1 + delta_width) / 2
-            y2 = (width2 + delta_width) / 2
-            polies.append(
-                gf.kdb.DPolygon(
-                    [
-                        gf.kdb.DPoint(0, y1),
-                        gf.kdb.DPoint(length, y2),
-                        gf.kdb.DPoint(length, -y2),
-                        gf.kdb.DPoint(0, -y1),
-                    ]
-                )
-            )
-            c.add_polygon(p1, layer=section.layer)
+        path = gf.path.straight(length=length, npoints=2)
+        for section_layer, region in extrude_sections(
+            path, x, width1, width2
+        ).items():
+            c.add_polygon(region, layer=section_layer)
 
     if with_bbox:
         x.add_bbox(c)
@@ -265,7 +310,6 @@ def taper_to_ridge(
 
     # if length:
     # xs.add_bbox(c)
-    c.flatten()
     return c
 
 
@@ -0,0 +1,141 @@
+import gdsfactory as gf
+import numpy as np
+from gdsfactory.constants import _glyph, _indent, _width
+from gdsfactory.typings import Coordinate, LayerSpec
+
+# Polygons, widths and indents of every character by font name. The glyphs
+# are drawn on a 1000 unit high grid and scaled to the text size.
+FONTS = {
+    "default": (_glyph, _width, _indent),
+}
+
+
+def _get_font(font: str) -> tuple[dict, dict, dict]:
+    if font not in FONTS:
+        raise ValueError(f"Unknown font {font!r}, available fonts are {list(FONTS)}")
+    return FONTS[font]
+
+
+def glyph(
+    character: str = "A",
+    size: float = 10.0,
+    layer: LayerSpec = "WG",
+    font: str = "default",
+) -> gf.Component:
+    """Returns a single character, its origin is the start of the baseline.
+
+    Parameters
+    ----------
+    character: str
+        The character.
+    size: float
+        The height of the character in um.
+    layer: LayerSpec
+        The layer of the character.
+    font: str
+        The name of the font in FONTS.
+    """
+    # The cell is keyed on the code point, cell names drop most punctuation
+    # and would give e.g. ":" and "_" the same cell
+    return _glyph_cell(code=ord(character), size=size, layer=layer, font=font)
+
+
+@gf.cell(basename="glyph")
+def _glyph_cell(
+    code: int,
+    size: float,
+    layer: LayerSpec,
+    font: str,
+) -> gf.Component:
+    glyphs, _, _ = _get_font(font)
+    scaling = size / 1000
+    c = gf.Component()
+    for polygon in glyphs[code]:
+        c.add_polygon(np.array(polygon) * scaling, layer=layer)
+    return c
+
+
+@gf.cell
+def text(
+    text: str = "abcd",
+    size: float = 10.0,
+    position: Coordinate = (0, 0),
+    justify: str = "left",
+    layer: LayerSpec = "WG",
+    font: str = "default",
+    flatten: bool = False,
+) -> gf.Component:
+    """Returns a text composed of references to cached characters.
+
+    Every character is built once per font, size and layer, so labelling many
+    variants only adds references. It is a drop-in replacement for
+    ``gf.components.text``.
+
+    Parameters
+    ----------
+    text: str
+        The text, lines are separated by newlines.
+    size: float
+        The height of the characters in um.
+    position: Coordinate
+        The start of the baseline of the first line.
+    justify: str
+        "left", "right" or "center", the lines are aligned to position.
+    layer: LayerSpec
+        The layer of the text.
+    font: str
+        The name of the font in FONTS.
+    flatten: bool
+        If True, the characters are flattened and merged into one polygon
+        set, e.g. for layers that are written with proximity correction.
+    """
+    justify = justify.lower()
+    if justify not in ("left", "right", "center"):
+        raise ValueError(f"justify = {justify!r} not in ('center', 'right', 'left')")
+    _, widths, indents = _get_font(font)
+    scaling = size / 1000
+    dbu = gf.kcl.dbu
+
+    c = gf.Component()
+    characters: dict[str, gf.Component] = {}
+    y = round(position[1] / dbu)
+    for line in text.split("\n"):
+        x = position[0]
+        placements = []
+        for character in line:
+            ascii_val = ord(character)
+            if character == " ":
+                x += 500 * scaling
+            elif 33 <= ascii_val <= 126:
+                if character not in characters:
+                    characters[character] = glyph(
+                        character=character, size=size, layer=layer, font=font
+                    )
+                placements.append((characters[character], round(x / dbu)))
+                x += (widths[ascii_val] + indents[ascii_val]) * scaling
+            else:
+                raise ValueError(f"No character with ascii value {ascii_val!r}")
+
+        # Align the outline of the line, like gf.components.text does
+        shift = 0
+        if placements and justify != "left":
+            xmin = min(cell.kdb_cell.bbox().left + ix for cell, ix in placements)
+            xmax = max(cell.kdb_cell.bbox().right + ix for cell, ix in placements)
+            if justify == "right":
+                shift = round(position[0] / dbu) - xmax
+            else:
+                shift = round(position[0] / dbu - (xmax - xmin) / 2) - xmin
+        for cell, ix in placements:
+            c.create_inst(cell, gf.kdb.Trans(ix + shift, y).to_dtype(dbu))
+        y -= round(1500 * scaling / dbu)
+
+    if flatten:
+        c.flatten()
+        for layer_index in c.kcl.layout.layer_indexes():
+            shapes = c.kdb_cell.shapes(layer_index)
+            if shapes.is_empty():
+                continue
+            region = gf.kdb.Region(shapes).merged()
+            shapes.clear()
+            shapes.insert(region)
+    return c
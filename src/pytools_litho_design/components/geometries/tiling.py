@@ -0,0 +1,134 @@
+import os
+
+import gdsfactory as gf
+from gdsfactory.typings import ComponentSpec, LayerSpec
+
+
+def tiled_region(
+    component: gf.Component,
+    inputs: dict[str, list[LayerSpec]],
+    expression: str,
+    border: float,
+    tile_size: float = 1000,
+    threads: int | None = None,
+    frame: gf.kdb.Box | None = None,
+) -> gf.kdb.Region:
+    """Evaluates a region expression over a component in parallel tiles.
+
+    The component is split into square tiles that are processed by KLayout's
+    tiling processor on several threads. Every tile sees the geometries up to
+    ``border`` um outside of it, so operations with a limited reach (sizing,
+    corner rounding, booleans) give the same result as on the flat layout as
+    long as the border is larger than that reach. The results are clipped to
+    their tiles and merged, so there are no seams.
+
+    Parameters
+    ----------
+    component: gf.Component
+        The component whose geometries are processed.
+    inputs: dict[str, list[LayerSpec]]
+        The names available in the expression, each the union of its layers.
+    expression: str
+        A KLayout expression that evaluates to a region, e.g. ``"a.sized(100)"``.
+        Distances are in database units. The variables ``_tile`` (the current
+        tile) and ``frame`` (the processed area) are also available.
+    border: float
+        The distance in um that every tile looks beyond its edges.
+    tile_size: float
+        The size of the tiles in um.
+    threads: int | None
+        The number of threads, defaults to the number of CPUs.
+    frame: gf.kdb.Box | None
+        The area to process in database units, defaults to the bounding box of
+        the component.
+
+    Returns
+    -------
+    gf.kdb.Region
+        The merged result in database units.
+    """
+    layout = component.kcl.layout
+    dbu = component.kcl.dbu
+    if frame is None:
+        frame = component.kdb_cell.bbox()
+
+    tp = gf.kdb.TilingProcessor()
+    tp.dbu = dbu
+    tp.frame = frame.to_dtype(dbu)
+    tp.tile_size(tile_size, tile_size)
+    tp.tile_border(border, border)
+    tp.threads = threads or os.cpu_count() or 1
+
+    # Every layer is an input of its own, they are combined in the script
+    script = []
+    for name, layers in inputs.items():
+        if not isinstance(layers, (tuple, list)):
+            layers = [layers]
+        names = []
+        for i, layer in enumerate(layers):
+            tp.input(
+                f"{name}_{i}",
+                layout,
+                component.cell_index(),
+                gf.get_layer(layer),
+            )
+            names.append(f"{name}_{i}")
+        script.append(f"var {name} = {' + '.join(names) or 'Region.new'};")
+
+    output = gf.kdb.Region()
+    tp.output("_result", output)
+    # The region has to outlive the execution, the processor does not own it
+    frame_region = gf.kdb.Region(frame)
+    tp.var("frame", frame_region)
+    script.append(f"_output(_result, ({expression}) & _tile & frame);")
+    tp.queue("\n".join(script))
+    tp.execute("Tiled region operation")
+
+    # Stitch the tiles back together
+    output.merge()
+    return output
+
+
+def invert_layer(
+    component: ComponentSpec,
+    layer: LayerSpec,
+    border: float = 5,
+    tile_size: float = 1000,
+    threads: int | None = None,
+) -> gf.Component:
+    """Returns the tone inverted geometries of a layer.
+
+    Parameters
+    ----------
+    component: ComponentSpec
+        The component to invert.
+    layer: LayerSpec
+        The layer to invert.
+    border: float
+        The margin around the bounding box of the component that is filled.
+    tile_size: float
+        The size of the tiles in um.
+    threads: int | None
+        The number of threads, defaults to the number of CPUs.
+
+    Returns
+    -------
+    gf.Component
+        A new component with the inverted geometries on the same layer.
+    """
+    if not isinstance(component, gf.Component):
+        component = gf.get_component(component)
+
+    frame = component.kdb_cell.bbox().enlarged(round(border / component.kcl.dbu))
+    region = tiled_region(
+        component=component,
+        inputs={"a": [layer]},
+        expression="frame - a",
+        border=0,
+        tile_size=tile_size,
+        threads=threads,
+        frame=frame,
+    )
+    c = gf.Component()
+    c.add_polygon(region, layer=layer)
+    return c
@@ -1,6 +1,8 @@
 import gdsfactory as gf
 from typing import Union, List
 
+from ..geometries import text as text_component
+
 
 @gf.cell
 def ebl_marker_jb(
@@ -75,7 +77,7 @@ def ebl_marker_jb(
     # Center the entire device around (0, 0)
     MARKER.center = (0, 0)
     if text is not None:
-        T = gf.components.text(text, size=text_size, layer=cross_section.layer)
+        T = text_component(text, size=text_size, layer=cross_section.layer)
         text = MARKER << T
         text.center = text_coordinates
 
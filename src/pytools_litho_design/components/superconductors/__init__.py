@@ -3,5 +3,5 @@ from .constrictions import (
     variable_length_hairpin_constriction,
     variable_length_meander_constriction,
 )
-from .optimal_steps import optimal_step
+from .optimal_steps import optimal_step, optimal_step_batch
 from .snspds import straight_snspd, hairpin_snspd, meander_snspd, choked_hairpin_snspd
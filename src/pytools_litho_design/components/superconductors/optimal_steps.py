@@ -7,6 +7,166 @@ from gdsfactory.component import Component
 from gdsfactory.typings import LayerSpec
 from typing import Union
 
+from ...cache import cache_key, load_arrays, save_arrays
+from ..geometries.sampling import sample_by_deviation
+
+# Number of samples in the precomputed normalised curves
+_CURVE_TABLE_POINTS = 4097
+# Sampling of the cached curves, change it when the table format changes so
+# tables saved in an older format are not loaded
+_CURVE_TABLE_FORMAT = "log_eta_num_squares"
+# Normalised x, y and number of squares of the curve per (ratio, width_tol)
+_CURVE_TABLES: dict[tuple[float, float], tuple[np.ndarray, np.ndarray, float]] = {}
+
+
+def _step_points(eta, W, a):
+    """Returns step points.
+
+    Returns points from a unit semicircle in the w (= u + iv) plane to
+    the optimal curve in the zeta (= x + iy) plane which transitions
+    a wire from a width of 'W' to a width of 'a'
+    eta takes value 0 to pi. All arguments may be arrays, they are broadcast
+    against each other.
+    """
+    gamma = (a**2 + W**2) / (a**2 - W**2)
+    w = np.exp(1j * eta)
+    zeta = (
+        4
+        * 1j
+        / np.pi
+        * (
+            W * np.arctan(np.sqrt((w - gamma) / (gamma + 1)))
+            + a * np.arctan(np.sqrt((gamma - 1) / (w - gamma)))
+        )
+    )
+    return np.real(zeta), np.imag(zeta)
+
+
+def _invert_step_eta(
+    x_desired=None,
+    y_desired=None,
+    W=1,
+    a=2,
+    num_iter: int = 50,
+) -> np.ndarray:
+    """Finds the eta associated with x_desired or y_desired along the optimal curve.
+
+    Both coordinates of the curve are monotonic in eta on (0, pi), so every
+    target is bracketed by the ends of the interval. All targets are solved
+    together with a vectorized bisection instead of one scalar minimisation
+    per point. The targets, W and a are broadcast against each other.
+    """
+    along_y = y_desired is not None
+    target = np.asarray(y_desired if along_y else x_desired, dtype=float)
+    W = np.asarray(W, dtype=complex)
+    a = np.asarray(a, dtype=complex)
+    shape = np.broadcast_shapes(target.shape, W.shape, a.shape)
+
+    def coordinate(eta):
+        x, y = _step_points(eta, W=W, a=a)
+        return y if along_y else x
+
+    # The curve diverges at eta = 0 and eta = pi, stay just inside
+    lo = np.full(shape, 1e-9)
+    hi = np.full(shape, np.pi - 1e-9)
+    increasing = coordinate(hi) > coordinate(lo)
+    for _ in range(num_iter):
+        mid = (lo + hi) / 2
+        overshoot = (coordinate(mid) > target) == increasing
+        hi = np.where(overshoot, mid, hi)
+        lo = np.where(overshoot, lo, mid)
+
+    return (lo + hi) / 2
+
+
+def _build_curve_tables(
+    ratios: np.ndarray, width_tol: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Computes the normalised optimal curves for an array of width ratios.
+
+    The curve only depends on ``end_width / start_width`` once scaled to a unit
+    start width. Only the ends of each curve are solved for, the points in
+    between are evaluated directly on an eta grid. The grid is uniform in
+    ``log(eta / (pi - eta))``, which keeps the x spacing close to uniform near
+    both logarithmic ends of the curve. Each row of the returned x and y
+    arrays is one curve with x increasing.
+    """
+    a = np.asarray(ratios, dtype=float)[:, None]
+    ends = np.concatenate(
+        (np.full_like(a, 1 + width_tol), a * (1 - width_tol)), axis=1
+    )
+    eta_ends = _invert_step_eta(y_desired=ends, W=1, a=a)
+    x_ends, _ = _step_points(eta_ends, W=1, a=a)
+    u_ends = np.log(eta_ends / (np.pi - eta_ends))
+    t = np.linspace(0, 1, _CURVE_TABLE_POINTS)
+    u = u_ends[:, :1] + (u_ends[:, 1:] - u_ends[:, :1]) * t
+    x, y = _step_points(np.pi / (1 + np.exp(-u)), W=1, a=a)
+
+    x[:, 0], x[:, -1] = x_ends[:, 0], x_ends[:, 1]
+    y[:, 0] = 1
+    y[:, -1] = a[:, 0]
+    if x[0, -1] < x[0, 0]:
+        x, y = x[:, ::-1], y[:, ::-1]
+    return x, y
+
+
+def _curve_table_key(ratio: float, width_tol: float) -> str:
+    """Returns the on-disk cache key of a normalised curve."""
+    return cache_key(
+        "optimal_step", ratio, width_tol, _CURVE_TABLE_POINTS, _CURVE_TABLE_FORMAT
+    )
+
+
+def _prefetch_curves(ratios: np.ndarray, width_tol: float) -> None:
+    """Makes sure the normalised curves for all ratios are memoised.
+
+    Curves that are neither in memory nor on disk are solved together in a
+    single vectorized computation.
+    """
+    missing = []
+    for ratio in sorted({round(float(r), 9) for r in np.ravel(ratios)}):
+        key = (ratio, float(width_tol))
+        if key in _CURVE_TABLES:
+            continue
+        arrays = load_arrays("optimal_step", _curve_table_key(*key))
+        if arrays is None:
+            missing.append(key[0])
+        else:
+            _CURVE_TABLES[key] = (
+                arrays["x"],
+                arrays["y"],
+                float(arrays["num_squares"]),
+            )
+
+    if not missing:
+        return
+    x, y = _build_curve_tables(np.array(missing), width_tol)
+    # The number of squares from the dense curve, so it does not depend on
+    # how a step is sampled
+    num_squares = np.sum(np.diff(x, axis=1) / ((y[:, :-1] + y[:, 1:]) / 2), axis=1)
+    for ratio, x_row, y_row, squares in zip(missing, x, y, num_squares):
+        key = (ratio, float(width_tol))
+        save_arrays(
+            "optimal_step",
+            _curve_table_key(*key),
+            x=x_row,
+            y=y_row,
+            num_squares=squares,
+        )
+        _CURVE_TABLES[key] = (x_row, y_row, float(squares))
+
+
+def _normalised_curve(
+    ratio: float, width_tol: float
+) -> tuple[np.ndarray, np.ndarray, float]:
+    """Returns the normalised optimal curve and its number of squares.
+
+    Curves are memoised in-process and persisted in the on-disk cache, so
+    every ratio is only solved once.
+    """
+    _prefetch_curves(np.array([ratio]), width_tol)
+    return _CURVE_TABLES[(round(float(ratio), 9), float(width_tol))]
+
 
 @gf.cell
 def optimal_step(
@@ -17,6 +177,8 @@ def optimal_step(
     anticrowding_factor: float = 1.2,
     symmetric: bool = False,
     port_type: str = "electrical",
+    max_deviation: float | None = None,
+    start_width: float | None = None,
 ) -> Component:
     """Returns an optimally-rounded step geometry.
 
@@ -31,51 +193,20 @@ def optimal_step(
     Optimal structure from https://doi.org/10.1103/PhysRevB.84.174510
     Clem, J., & Berggren, K. (2011). Geometry-dependent critical currents in
     superconducting nanocircuits. Physical Review B, 84(17), 1-27.
+
+    The step starts at the width of ``cross_section`` unless ``start_width``
+    is given. By default the curve is sampled with ``num_pts`` points spaced
+    uniformly in x. When ``max_deviation`` (in nm) is given the vertices are instead placed
+    by curvature so the polygon stays within ``max_deviation`` of the optimal
+    curve. ``num_pts`` then caps the number of vertices, so a tight tolerance
+    never draws more vertices than the uniform sampling. If the tolerance
+    needs more vertices a warning is issued, increase ``num_pts`` to meet it. ``num_squares`` is
+    integrated on the dense cached curve, so it is the same in both cases.
     """
     if isinstance(cross_section, str):
         cross_section = gf.get_cross_section(cross_section)
-    start_width = cross_section.width
-
-    def step_points(eta: float, W: complex, a: complex) -> tuple[float, float]:
-        """Returns step points.
-
-        Returns points from a unit semicircle in the w (= u + iv) plane to
-        the optimal curve in the zeta (= x + iy) plane which transitions
-        a wire from a width of 'W' to a width of 'a'
-        eta takes value 0 to pi
-        """
-        gamma = (a**2 + W**2) / (a**2 - W**2)
-        w = np.exp(1j * eta)
-        zeta = (
-            4
-            * 1j
-            / np.pi
-            * (
-                W * np.arctan(np.sqrt((w - gamma) / (gamma + 1)))
-                + a * np.arctan(np.sqrt((gamma - 1) / (w - gamma)))
-            )
-        )
-        return np.real(zeta), np.imag(zeta)
-
-    def invert_step_point(
-        x_desired: float = -10,
-        y_desired: float | None = None,
-        W: float = 1,
-        a: float = 2,
-    ) -> tuple[float, float]:
-        """Finds the eta associated with x_desired or y_desired along the optimal curve."""
-
-        def fh(eta: float) -> float:
-            guessed_x, guessed_y = step_points(eta, W=W + 0j, a=a + 0j)
-            if y_desired is None:
-                return (guessed_x - x_desired) ** 2  # Error relative to x_desired
-            return (guessed_y - y_desired) ** 2  # Error relative to y_desired
-
-        from scipy.optimize import fminbound
-
-        # Minimize error to find optimal eta
-        found_eta = fminbound(fh, 0, np.pi)
-        return step_points(found_eta, W=W + 0j, a=a + 0j)
+    if start_width is None:
+        start_width = cross_section.width
 
     if start_width > end_width:
         reverse = True
@@ -100,22 +231,31 @@ def optimal_step(
             xpts = [0, 0, start_width, start_width]
         D.info["num_squares"] = 1
     else:
-        xmin, _ = invert_step_point(
-            y_desired=start_width * (1 + width_tol), W=start_width, a=end_width
+        # Look up the normalised curve and rescale it to the start width
+        x_table, y_table, num_squares = _normalised_curve(
+            end_width / start_width, width_tol
         )
-        xmax, _ = invert_step_point(
-            y_desired=end_width * (1 - width_tol), W=start_width, a=end_width
-        )
-
-        xpts = list(np.linspace(xmin, xmax, num_pts))
-        for x in xpts:
-            x, y = invert_step_point(x_desired=x, W=start_width, a=end_width)
-            ypts.append(y)
+        if max_deviation is None:
+            x_samples = np.linspace(x_table[0], x_table[-1], num_pts)
+            y_samples = np.interp(x_samples, x_table, y_table)
+        else:
+            # Sample in the final drawn coordinates so the deviation is in nm
+            x_scale = start_width * anticrowding_factor
+            y_scale = start_width
+            if symmetric:
+                x_scale, y_scale = x_scale / 2, y_scale / 2
+            x_samples, y_samples = sample_by_deviation(
+                x_table * x_scale,
+                y_table * y_scale,
+                max_deviation=max_deviation,
+                max_points=num_pts,
+            )
+            x_samples, y_samples = x_samples / x_scale, y_samples / y_scale
+        xpts = [float(x) * start_width for x in x_samples]
+        ypts = [float(y) * start_width for y in y_samples]
 
         ypts[-1] = end_width
         ypts[0] = start_width
-        y_num_sq = np.array(ypts)
-        x_num_sq = np.array(xpts)
 
         if not symmetric:
             xpts.append(xpts[-1])
@@ -138,11 +278,7 @@ def optimal_step(
             xpts = [-x for x in xpts]
             start_width, end_width = end_width, start_width
 
-        D.info["num_squares"] = float(
-            np.round(
-                np.sum(np.diff(x_num_sq) / ((y_num_sq[:-1] + y_num_sq[1:]) / 2)), 3
-            )
-        )
+        D.info["num_squares"] = float(np.round(num_squares, 3))
 
     D.add_polygon(list(zip(xpts, ypts)), layer=cross_section.layer)
     if not symmetric:
@@ -157,8 +293,8 @@ def optimal_step(
             )
             D.add_port(
                 name="e2",
-                center=(min(xpts), cross_section.width / 2),
-                # width=cross_section.width,
+                center=(min(xpts), start_width / 2),
+                width=start_width,
                 orientation=180,
                 port_type="electrical",
                 cross_section=cross_section,
@@ -173,8 +309,8 @@ def optimal_step(
             )
             D.add_port(
                 name="o2",
-                center=(min(xpts), cross_section.width / 2),
-                # width=cross_section.width,
+                center=(min(xpts), start_width / 2),
+                width=start_width,
                 orientation=180,
                 cross_section=cross_section,
             )
@@ -191,6 +327,7 @@ def optimal_step(
             D.add_port(
                 name="e2",
                 center=(min(xpts), 0),
+                width=start_width,
                 orientation=180,
                 port_type="electrical",
                 cross_section=cross_section,
@@ -199,6 +336,7 @@ def optimal_step(
             D.add_port(
                 name="o1",
                 center=(min(xpts), 0),
+                width=start_width,
                 orientation=180,
                 cross_section=cross_section,
             )
@@ -212,6 +350,67 @@ def optimal_step(
     return D
 
 
+def optimal_step_batch(
+    end_widths: list[float] | np.ndarray,
+    start_widths: list[float] | np.ndarray | float | None = None,
+    cross_section: str = "strip",
+    width_tol: float = 1e-3,
+    **kwargs,
+) -> tuple[list[Component], np.ndarray]:
+    """Returns optimal steps for many (start_width, end_width) pairs at once.
+
+    The curves of all width ratios that are not cached yet are solved in one
+    vectorized computation, after which every step is created through the
+    normal cached :func:`optimal_step` cell.
+
+    Parameters
+    ----------
+    end_widths: list[float] | np.ndarray
+        The end widths of the steps.
+    start_widths: list[float] | np.ndarray | float | None
+        The start widths of the steps, broadcast against ``end_widths``.
+        Defaults to the width of ``cross_section``.
+    cross_section: str
+        The cross section used for the layer and ports of the steps.
+    width_tol: float
+        The relative width tolerance at the ends of the steps.
+    **kwargs
+        Other arguments passed to :func:`optimal_step`.
+
+    Returns
+    -------
+    tuple[list[Component], np.ndarray]
+        The step components and their number of squares.
+    """
+    default_width = gf.get_cross_section(cross_section).width
+    if start_widths is None:
+        start_widths = default_width
+    end_widths, start_widths = np.broadcast_arrays(
+        np.asarray(end_widths, dtype=float), np.asarray(start_widths, dtype=float)
+    )
+    end_widths, start_widths = end_widths.ravel(), start_widths.ravel()
+
+    narrow = np.minimum(start_widths, end_widths)
+    wide = np.maximum(start_widths, end_widths)
+    stepped = wide != narrow
+    _prefetch_curves(wide[stepped] / narrow[stepped], width_tol)
+
+    # start_width is only passed if it differs from the cross section, so the
+    # cells are the same as the ones of plain optimal_step calls
+    components = [
+        optimal_step(
+            end_width=float(end_width),
+            cross_section=cross_section,
+            width_tol=width_tol,
+            **({} if start_width == default_width else {"start_width": start_width}),
+            **kwargs,
+        )
+        for start_width, end_width in zip(start_widths.tolist(), end_widths)
+    ]
+    num_squares = np.array([c.info["num_squares"] for c in components])
+    return components, num_squares
+
+
 if __name__ == "__main__":
     c = optimal_step(symmetric=True)
     c.show()
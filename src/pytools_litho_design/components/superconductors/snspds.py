@@ -8,7 +8,7 @@ from .constrictions import (
     variable_length_hairpin_constriction,
     variable_length_meander_constriction,
 )
-from ..geometries import taper_to_ridge, add_protection_mask
+from ..geometries import taper_to_ridge, add_protection_mask, rounded_rectangle
 from gdsfactory.components.waveguides import straight as straight_waveguide
 from typing import Union
 
@@ -50,20 +50,11 @@ def straight_snspd(
         nanowire.ymin + nanowire.ysize / 2,
     )
     if add_channel_protection:
-        PROTECTION_LAYER = gf.components.rectangle(
+        protection_rect = C << rounded_rectangle(
             size=(nanowire.xsize * 0.3, channel_width * 3 + 3),
+            radius=2,
             layer=waveguide_xs.layer,
-        ).copy()
-        rinner = 2000
-        router = rinner
-        ROUNDED_PROTECTION_LAYER = gf.Component()
-        for p in PROTECTION_LAYER.get_polygons(layers=[waveguide_xs.layer])[
-            gf.get_layer(waveguide_xs.layer)
-        ]:
-            p_round = p.round_corners(rinner, router, 200)
-            ROUNDED_PROTECTION_LAYER.add_polygon(p_round, layer=waveguide_xs.layer)
-
-        protection_rect = C << ROUNDED_PROTECTION_LAYER
+        )
 
         # Position the center over the center of the wire
         protection_rect.center = nanowire.center
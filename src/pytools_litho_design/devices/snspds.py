@@ -53,7 +53,57 @@ def _add_pads(
     waveguide_cross_section: str | gf.CrossSection = "asic",
     protection_mask_cross_section: str | gf.CrossSection | None = None,
 ) -> gf.Component:
-    """Adds pads to the component."""
+    """Adds pads to the component.
+
+    The pads, their routes and the protection mask only depend on the
+    electrical ports of the component, so they are built once as a template
+    and every component with the same ports gets a reference to it.
+    """
+    # Port geometry in dbu relative to the component origin
+    ports = tuple(
+        (
+            name,
+            port.trans.disp.x,
+            port.trans.disp.y,
+            port.trans.angle,
+            round(port.width / component.kcl.dbu),
+            port.layer,
+            port.port_type,
+        )
+        for name, port in ((name, component.ports[name]) for name in ("e1", "e2"))
+    )
+
+    C = gf.Component()
+    C << component
+    C << _pad_template(
+        pad=pad,
+        pad_distance=tuple(pad_distance),
+        ports=ports,
+        coarse_metal_cross_section=coarse_metal_cross_section,
+        waveguide_cross_section=waveguide_cross_section,
+        protection_mask_cross_section=protection_mask_cross_section,
+    )
+
+    # Add the original ports to the component
+    C.add_ports(component.ports)
+
+    return C
+
+
+@gf.cell
+def _pad_template(
+    pad: str | gf.Component,
+    pad_distance: Tuple[float, float],
+    ports: Tuple[Tuple[str, int, int, int, int, int, str], ...],
+    coarse_metal_cross_section: str | gf.CrossSection,
+    waveguide_cross_section: str | gf.CrossSection = "asic",
+    protection_mask_cross_section: str | gf.CrossSection | None = None,
+) -> gf.Component:
+    """Returns the pads and their routes to the ports e1 and e2 of a device.
+
+    The ports are given as (name, x, y, angle, width, layer, port_type) with
+    the coordinates and the width in dbu.
+    """
     if isinstance(coarse_metal_cross_section, str):
         coarse_metal_cross_section = gf.get_cross_section(coarse_metal_cross_section)
     if isinstance(waveguide_cross_section, str):
@@ -67,11 +117,19 @@ def _add_pads(
         )
     if isinstance(pad, str):
         pad = gf.get_component(pad)
-    if isinstance(pad, gf.Component):
-        pad = pad.copy()
+
+    device_ports = {
+        name: gf.Port(
+            name=name,
+            trans=gf.kdb.Trans(angle, False, x, y),
+            width=width * gf.kcl.dbu,
+            layer=layer,
+            port_type=port_type,
+        )
+        for name, x, y, angle, width, layer, port_type in ports
+    }
 
     C = gf.Component()
-    snspd_ref = C << component
 
     # Add the pads and move to the right position
     pad1 = C << pad
@@ -83,14 +141,14 @@ def _add_pads(
     left_route = gf.routing.route_bundle(
         C,
         [pad1.ports["e4"]],
-        [snspd_ref.ports["e1"]],
+        [device_ports["e1"]],
         cross_section=coarse_metal_cross_section,
         router="optical",
     )
     right_route = gf.routing.route_bundle(
         C,
         [pad2.ports["e4"]],
-        [snspd_ref.ports["e2"]],
+        [device_ports["e2"]],
         cross_section=coarse_metal_cross_section,
         router="optical",
     )
@@ -121,9 +179,6 @@ def _add_pads(
             }
         )
 
-    # Add the original ports to the component
-    C.add_ports(component.ports)
-
     return C
 
 
@@ -1 +1,11 @@
-from .single_variable_sweep import single_variabel_sweep_components
+from .single_variable_sweep import (
+    single_variabel_sweep_components,
+    single_variabel_sweep_stream,
+)
+from .streaming import GdsStreamWriter, prune_cell
+from .multi_variable_sweep import (
+    geometry_hash,
+    multi_variable_sweep_components,
+    sweep_points,
+)
+from .packing import pack_components, pack_shelves
@@ -0,0 +1,165 @@
+import hashlib
+import itertools
+from typing import Any, Literal, Sequence
+
+import gdsfactory as gf
+import numpy as np
+
+from .single_variable_sweep import _labeled_variant
+from .streaming import prune_cell
+
+
+def sweep_points(
+    variables: dict[str, Sequence[Any]] | Sequence[dict[str, Any]],
+    method: Literal["grid", "lhs", "list"] = "grid",
+    samples: int | None = None,
+    seed: int | None = 0,
+) -> list[dict[str, Any]]:
+    """Returns the parameter combinations of a sweep.
+
+    Parameters
+    ----------
+    variables: dict[str, Sequence[Any]] | Sequence[dict[str, Any]]
+        The values of every swept setting, or the combinations themselves for
+        the "list" method.
+    method: Literal["grid", "lhs", "list"]
+        "grid" combines all values of all settings, "lhs" takes a Latin
+        hypercube sample in which every setting covers its range evenly and
+        "list" uses the given combinations as they are.
+    samples: int | None
+        The number of combinations of the "lhs" method, defaults to the
+        largest number of values of a setting.
+    seed: int | None
+        The seed of the "lhs" method.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        The settings of every point of the sweep.
+    """
+    if method == "list":
+        return [dict(point) for point in variables]
+    if not isinstance(variables, dict):
+        raise ValueError(f"The {method!r} method needs a dict of values")
+
+    names = list(variables)
+    values = [list(variables[name]) for name in names]
+    if method == "grid":
+        return [dict(zip(names, point)) for point in itertools.product(*values)]
+    if method == "lhs":
+        samples = samples or max(len(v) for v in values)
+        rng = np.random.default_rng(seed)
+        points = [{} for _ in range(samples)]
+        for name, options in zip(names, values):
+            # One sample per stratum, the strata are shuffled per setting
+            strata = (rng.permutation(samples) + rng.random(samples)) / samples
+            indices = np.minimum((strata * len(options)).astype(int), len(options) - 1)
+            for point, index in zip(points, indices):
+                point[name] = options[index]
+        return points
+    raise ValueError(f"Unknown sweep method {method!r}, use 'grid', 'lhs' or 'list'")
+
+
+def multi_variable_sweep_components(
+    component: str | gf.Component,
+    static_settings: dict[str, Any],
+    variables: dict[str, Sequence[Any]] | Sequence[dict[str, Any]],
+    method: Literal["grid", "lhs", "list"] = "grid",
+    samples: int | None = None,
+    seed: int | None = 0,
+    variable_nicknames: dict[str, str] | None = None,
+    label_pos: tuple[float, float] | None = None,
+    label_size: float = 20,
+    label_layer: str | None = None,
+    deduplicate: bool = True,
+) -> list[tuple[dict[str, Any], gf.Component]]:
+    """Returns a component for every combination of several settings.
+
+    Combinations that give the same geometry and ports share one cell, the
+    duplicate cells are deleted from the layout as soon as they are found.
+
+    Parameters
+    ----------
+    component: str | gf.Component
+        The component function or its name in the PDK.
+    static_settings: dict[str, Any]
+        The settings that are the same for all variants.
+    variables: dict[str, Sequence[Any]] | Sequence[dict[str, Any]]
+        The swept settings, see :func:`sweep_points`.
+    method: Literal["grid", "lhs", "list"]
+        How the combinations are chosen, see :func:`sweep_points`.
+    samples: int | None
+        The number of combinations of the "lhs" method.
+    seed: int | None
+        The seed of the "lhs" method.
+    variable_nicknames: dict[str, str] | None
+        The names of the settings in the labels, defaults to their names.
+    label_pos: tuple[float, float] | None
+        The position of the labels, no labels are added if None.
+    label_size: float
+        The size of the labels.
+    label_layer: str | None
+        The layer of the labels.
+    deduplicate: bool
+        If True, combinations with identical geometry share one cell.
+
+    Returns
+    -------
+    list[tuple[dict[str, Any], gf.Component]]
+        The settings and the component of every point of the sweep.
+    """
+    points = sweep_points(variables, method=method, samples=samples, seed=seed)
+    variable_nicknames = variable_nicknames or {}
+    layout = gf.kcl.layout
+
+    unique: dict[str, gf.Component] = {}
+    sweep = []
+    for point in points:
+        before = {cell.cell_index() for cell in layout.each_cell()}
+        c = gf.get_component(component, **static_settings, **point)
+        if deduplicate:
+            key = geometry_hash(c)
+            if key in unique:
+                if c.cell_index() not in before:
+                    prune_cell(c, keep=before)
+                c = unique[key]
+            else:
+                unique[key] = c
+
+        # Add a label if label_pos is provided
+        if label_pos is not None:
+            text = ", ".join(
+                f"{variable_nicknames.get(name, name)}: {value}"
+                for name, value in point.items()
+            )
+            c = _labeled_variant(
+                component=c,
+                text=text,
+                label_pos=label_pos,
+                label_size=label_size,
+                label_layer=label_layer,
+            )
+        sweep.append((point, c))
+    return sweep
+
+
+def geometry_hash(component: gf.Component) -> str:
+    """Returns a hash of the flattened geometry and the ports of a component.
+
+    Components with the same hash are identical on every layer, regardless
+    of their hierarchy and names.
+    """
+    layout = component.kcl.layout
+    h = hashlib.sha256()
+    for layer_index in sorted(
+        layout.layer_indexes(), key=lambda index: str(layout.get_info(index))
+    ):
+        region = gf.kdb.Region(component.kdb_cell.begin_shapes_rec(layer_index))
+        if region.is_empty():
+            continue
+        h.update(str(layout.get_info(layer_index)).encode())
+        for polygon in sorted(str(p) for p in region.merged().each()):
+            h.update(polygon.encode())
+    for port in sorted(component.ports, key=lambda port: port.name or ""):
+        h.update(f"{port.name}{port.trans}{port.width}{port.layer}".encode())
+    return h.hexdigest()
@@ -0,0 +1,127 @@
+from typing import Sequence
+
+import gdsfactory as gf
+import numpy as np
+
+# Side of the bounding box a port points to, by port orientation
+_PORT_SIDES = {0: "east", 90: "north", 180: "west", 270: "south"}
+
+
+def pack_shelves(
+    sizes: np.ndarray,
+    area: tuple[float, float],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Packs rectangles into as few areas as possible with the shelf algorithm.
+
+    The rectangles are sorted by decreasing height and put next to each other
+    on horizontal shelves. A rectangle goes to the first shelf that has room
+    for it, a new shelf is opened in the first area that has room for it, and
+    a new area is opened when none has.
+
+    Parameters
+    ----------
+    sizes: np.ndarray
+        Width and height of every rectangle, with shape (n, 2).
+    area: tuple[float, float]
+        Width and height of the areas.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The index of the area of every rectangle and the position of its lower
+        left corner in that area.
+    """
+    sizes = np.asarray(sizes, dtype=float).reshape(-1, 2)
+    width, height = area
+    too_large = np.flatnonzero((sizes[:, 0] > width) | (sizes[:, 1] > height))
+    if too_large.size:
+        raise ValueError(
+            f"Items {too_large.tolist()} do not fit in an area of {width} x {height}"
+        )
+
+    bins = np.zeros(len(sizes), dtype=int)
+    positions = np.zeros((len(sizes), 2))
+    # Every shelf is [area, y, height, used width]
+    shelves: list[list[float]] = []
+    used_heights: list[float] = []
+    for i in np.lexsort((-sizes[:, 0], -sizes[:, 1])):
+        w, h = sizes[i]
+        for shelf in shelves:
+            if shelf[3] + w <= width and h <= shelf[2]:
+                break
+        else:
+            # Open a new shelf, the first item sets its height
+            area_index = next(
+                (j for j, used in enumerate(used_heights) if used + h <= height),
+                len(used_heights),
+            )
+            if area_index == len(used_heights):
+                used_heights.append(0)
+            shelf = [area_index, used_heights[area_index], h, 0]
+            used_heights[area_index] += h
+            shelves.append(shelf)
+        bins[i] = shelf[0]
+        positions[i] = shelf[3], shelf[1]
+        shelf[3] += w
+    return bins, positions
+
+
+def pack_components(
+    components: Sequence[gf.Component],
+    area: tuple[float, float] = (10000, 10000),
+    margin: float = 10,
+    port_clearance: float = 0,
+) -> list[gf.Component]:
+    """Places components in as few dies (or write fields) as possible.
+
+    The bounding boxes of the components are packed with :func:`pack_shelves`,
+    which keeps components of similar height on the same row and wastes far
+    less area than a fixed grid when the sizes differ.
+
+    Parameters
+    ----------
+    components: Sequence[gf.Component]
+        The components to place, e.g. the variants of a sweep.
+    area: tuple[float, float]
+        Width and height of a die, the lower left corner is at (0, 0).
+    margin: float
+        The keep-out distance around every component. Neighbouring components
+        are at least twice this far apart.
+    port_clearance: float
+        Extra keep-out on the sides of a component that have ports, so there
+        is room to route to them or to couple fibers.
+
+    Returns
+    -------
+    list[gf.Component]
+        One component per die that is used.
+    """
+    boxes = np.array(
+        [(b.left, b.bottom, b.right, b.top) for b in (c.dbbox() for c in components)]
+    ).reshape(-1, 4)
+
+    # Keep-out on every side, ordered west, south, east, north
+    keep_out = np.full((len(components), 4), float(margin))
+    if port_clearance:
+        sides = ("west", "south", "east", "north")
+        for i, c in enumerate(components):
+            for port in c.ports:
+                side = _PORT_SIDES.get(round(port.orientation) % 360)
+                if side is not None:
+                    keep_out[i, sides.index(side)] = margin + port_clearance
+
+    sizes = np.column_stack(
+        (
+            boxes[:, 2] - boxes[:, 0] + keep_out[:, 0] + keep_out[:, 2],
+            boxes[:, 3] - boxes[:, 1] + keep_out[:, 1] + keep_out[:, 3],
+        )
+    )
+    bins, positions = pack_shelves(sizes, area)
+    # Move the lower left corner of every bounding box inside its keep-out
+    offsets = positions + keep_out[:, :2] - boxes[:, :2]
+
+    dies = [gf.Component() for _ in range(bins.max() + 1 if len(bins) else 0)]
+    for c, die, (x, y) in zip(components, bins, offsets):
+        ref = dies[die] << c
+        ref.dmove((x, y))
+    return dies
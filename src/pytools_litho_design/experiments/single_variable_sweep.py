@@ -1,6 +1,20 @@
-from typing import Any, List
+from typing import Any, Iterable, Iterator, List
 import gdsfactory as gf
-from functools import partial
+import itertools
+import kfactory as kf
+import os
+import tempfile
+import warnings
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+
+from ..cache import cache_key
+from ..components.geometries import text as text_component
+from ..pdks.loader import get_pdk
+from .streaming import GdsStreamWriter, prune_cell
 
 
 def single_variabel_sweep_components(
@@ -12,36 +26,338 @@ def single_variabel_sweep_components(
     label_pos: tuple[float, float] | None = None,
     label_size: float = 20,
     label_layer: str | None = None,
+    processes: int = 1,
+    pdk_name: str | None = None,
 ) -> List[gf.Component]:
-    if isinstance(component, str):
-        component = gf.get_component(component)
-    # if isinstance(label_layer, str):
-    #     label_layer = gf.get_layer_tuple(label_layer)
+    """Returns a component for every value of one of its settings.
+
+    Parameters
+    ----------
+    component: str | gf.Component
+        The component function or its name in the PDK.
+    static_settings: dict[str, Any]
+        The settings that are the same for all variants.
+    variable_name: str
+        The name of the swept setting.
+    variable_values: list[Any]
+        The values of the swept setting.
+    variable_nickname: str | None
+        The name of the setting in the labels, defaults to variable_name.
+    label_pos: tuple[float, float] | None
+        The position of the labels, no labels are added if None.
+    label_size: float
+        The size of the labels.
+    label_layer: str | None
+        The layer of the labels.
+    processes: int
+        The number of worker processes that build the variants. With 1 the
+        variants are built in this process.
+    pdk_name: str | None
+        The PDK the workers activate with get_pdk, defaults to the active PDK.
+        If the active PDK cannot be rebuilt that way, the variants are built
+        in this process with a warning.
+
+    Returns
+    -------
+    List[gf.Component]
+        The variants in the order of variable_values.
+    """
+    settings = _variant_settings(
+        component,
+        static_settings,
+        variable_name,
+        variable_values,
+        variable_nickname,
+        label_pos,
+        label_size,
+        label_layer,
+    )
+    if processes <= 1:
+        return [_build_variant(**s) for s in settings]
+    return list(_parallel_variants(settings, processes, pdk_name))
+
+
+def single_variabel_sweep_stream(
+    component: str | gf.Component,
+    static_settings: dict[str, Any],
+    variable_name: str,
+    variable_values: Iterable[Any],
+    variable_nickname: str | None = None,
+    label_pos: tuple[float, float] | None = None,
+    label_size: float = 20,
+    label_layer: str | None = None,
+    writer: GdsStreamWriter | None = None,
+    pitch: tuple[float, float] | None = None,
+    prune: bool = True,
+    processes: int = 1,
+    pdk_name: str | None = None,
+) -> Iterator[gf.Component]:
+    """Yields the variants of a sweep one at a time.
 
-    sweep = []
-    component = partial(component, **static_settings)
+    The variants are built lazily, optionally written to a GDS file right
+    away and deleted from the layout when the next variant is requested, so
+    the memory use does not grow with the length of the sweep. Cells that
+    existed before the sweep started are never deleted.
+
+    Parameters
+    ----------
+    component: str | gf.Component
+        The component function or its name in the PDK.
+    static_settings: dict[str, Any]
+        The settings that are the same for all variants.
+    variable_name: str
+        The name of the swept setting.
+    variable_values: Iterable[Any]
+        The values of the swept setting.
+    variable_nickname: str | None
+        The name of the setting in the labels, defaults to variable_name.
+    label_pos: tuple[float, float] | None
+        The position of the labels, no labels are added if None.
+    label_size: float
+        The size of the labels.
+    label_layer: str | None
+        The layer of the labels.
+    writer: GdsStreamWriter | None
+        Every variant is written to it before it is yielded.
+    pitch: tuple[float, float] | None
+        The offset between variants in the top cell of the writer, the
+        variants are not placed if None.
+    prune: bool
+        If True, a variant is deleted once the next one is requested. Use it
+        (or copy it) before that.
+    processes: int
+        The number of worker processes that build the variants. With 1 the
+        variants are built in this process.
+    pdk_name: str | None
+        The PDK the workers activate with get_pdk, defaults to the active PDK.
+        If the active PDK cannot be rebuilt that way, the variants are built
+        in this process with a warning.
+
+    Yields
+    ------
+    gf.Component
+        The variants in the order of variable_values.
+    """
+    settings = _variant_settings(
+        component,
+        static_settings,
+        variable_name,
+        variable_values,
+        variable_nickname,
+        label_pos,
+        label_size,
+        label_layer,
+    )
+    if processes <= 1:
+        variants = (_build_variant(**s) for s in settings)
+    else:
+        variants = _parallel_variants(settings, processes, pdk_name)
+
+    layout = gf.kcl.layout
+    keep = {cell.cell_index() for cell in layout.each_cell()}
+    for i in itertools.count():
+        before = {cell.cell_index() for cell in layout.each_cell()}
+        c = next(variants, None)
+        if c is None:
+            return
+        # Some components leave unused cells behind, e.g. after flattening
+        leftovers = [
+            cell.cell_index()
+            for cell in layout.each_cell()
+            if cell.cell_index() not in before
+            and cell.cell_index() != c.cell_index()
+            and cell.parent_cells() == 0
+        ]
+
+        if writer is not None:
+            position = None if pitch is None else (i * pitch[0], i * pitch[1])
+            writer.write(c, position=position)
+        yield c
+        if prune:
+            prune_cell(c, keep=keep)
+            for index in leftovers:
+                prune_cell(gf.kcl[index], keep=keep)
+
+
+def _variant_settings(
+    component: str | gf.Component,
+    static_settings: dict[str, Any],
+    variable_name: str,
+    variable_values: Iterable[Any],
+    variable_nickname: str | None,
+    label_pos: tuple[float, float] | None,
+    label_size: float,
+    label_layer: str | None,
+) -> Iterator[dict[str, Any]]:
     for value in variable_values:
-        c = component(**{variable_name: value})
-
-        # Add a label if label_pos is provided
-        if label_pos is not None:
-            if variable_nickname is None:
-                variable_nickname = variable_name
-            # new_c = gf.Component()
-            LABEL = gf.components.text(
-                text=f"{variable_nickname}: {value}",
-                size=label_size,
-                position=label_pos,
-                layer=label_layer,
-            )
-            new_c = gf.Component()
-            label = new_c << LABEL
-            label.move(label_pos)
-            old_c = new_c << c
-            for port in old_c.ports:
-                new_c.add_port(name=port.name, port=port)
-
-            c = new_c
-        sweep.append(c)
-
-    return sweep
+        yield dict(
+            component=component,
+            static_settings=static_settings,
+            variable_name=variable_name,
+            value=value,
+            variable_nickname=variable_nickname,
+            label_pos=label_pos,
+            label_size=label_size,
+            label_layer=label_layer,
+        )
+
+
+def _parallel_variants(
+    settings: Iterable[dict[str, Any]],
+    processes: int,
+    pdk_name: str | None,
+) -> Iterator[gf.Component]:
+    # The workers return every variant as a GDS file. Cells are matched by
+    # name when they are merged, so cells that are shared between variants
+    # (or already exist here) are only loaded once.
+    worker_pdk = pdk_name or gf.get_active_pdk().name
+    try:
+        get_pdk(worker_pdk, set_active=False)
+    except ValueError:
+        if pdk_name is not None:
+            raise
+        yield from _sequential_variants(settings)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(worker_pdk,),
+    ) as executor:
+        # Without an explicit pdk_name the workers must rebuild the active
+        # PDK, which fails if it was changed at runtime
+        if pdk_name is None:
+            fingerprint = executor.submit(_pdk_fingerprint)
+            if _worker_result(fingerprint, worker_pdk) != _pdk_fingerprint():
+                executor.shutdown(cancel_futures=True)
+                yield from _sequential_variants(settings)
+                return
+
+        # Only a few builds run ahead, so finished variants do not pile up
+        # when they are consumed slowly
+        pending = deque()
+        for s in settings:
+            pending.append(executor.submit(_build_variant_gds, s))
+            if len(pending) >= 2 * processes:
+                yield _merge_gds(*_worker_result(pending.popleft(), worker_pdk))
+        while pending:
+            yield _merge_gds(*_worker_result(pending.popleft(), worker_pdk))
+
+
+def _sequential_variants(settings: Iterable[dict[str, Any]]) -> Iterator[gf.Component]:
+    warnings.warn(
+        f"The active PDK {gf.get_active_pdk().name!r} cannot be rebuilt in worker "
+        "processes with get_pdk, the variants are built in this process instead.",
+        stacklevel=4,
+    )
+    for s in settings:
+        yield _build_variant(**s)
+
+
+def _pdk_fingerprint() -> str:
+    """Returns a hash of the cells and cross sections of the active PDK."""
+    pdk = gf.get_active_pdk()
+    cross_sections = {}
+    for name in pdk.cross_sections:
+        try:
+            cross_sections[name] = gf.get_cross_section(name).name
+        except TypeError:
+            cross_sections[name] = None
+    return cache_key(pdk.name, sorted(pdk.cells), cross_sections)
+
+
+def _worker_result(future: Future, pdk_name: str) -> Any:
+    try:
+        return future.result()
+    except BrokenProcessPool as error:
+        raise RuntimeError(
+            f"A sweep worker stopped unexpectedly, check that the PDK {pdk_name!r} "
+            "can be activated with get_pdk in a new process."
+        ) from error
+
+
+def _build_variant(
+    component: str | gf.Component,
+    static_settings: dict[str, Any],
+    variable_name: str,
+    value: Any,
+    variable_nickname: str | None,
+    label_pos: tuple[float, float] | None,
+    label_size: float,
+    label_layer: str | None,
+) -> gf.Component:
+    c = gf.get_component(component, **static_settings, **{variable_name: value})
+
+    # Add a label if label_pos is provided
+    if label_pos is not None:
+        if variable_nickname is None:
+            variable_nickname = variable_name
+        c = _labeled_variant(
+            component=c,
+            text=f"{variable_nickname}: {value}",
+            label_pos=label_pos,
+            label_size=label_size,
+            label_layer=label_layer,
+        )
+    return c
+
+
+@gf.cell
+def _labeled_variant(
+    component: gf.Component,
+    text: str,
+    label_pos: tuple[float, float],
+    label_size: float,
+    label_layer: str | None,
+) -> gf.Component:
+    LABEL = text_component(
+        text=text,
+        size=label_size,
+        position=label_pos,
+        layer=label_layer,
+    )
+    new_c = gf.Component()
+    label = new_c << LABEL
+    label.move(label_pos)
+    old_c = new_c << component
+    for port in old_c.ports:
+        new_c.add_port(name=port.name, port=port)
+    return new_c
+
+
+def _init_worker(pdk_name: str) -> None:
+    get_pdk(pdk_name)
+
+
+def _build_variant_gds(settings: dict[str, Any]) -> tuple[str, bytes]:
+    c = _build_variant(**settings)
+    # Unnamed cells are numbered per process and would collide with the ones
+    # of other workers, the name of the variant makes them unique
+    layout = c.kcl.layout
+    for index in c.kdb_cell.called_cells():
+        cell = layout.cell(index)
+        if cell.name.startswith("Unnamed_"):
+            cell.name = f"{c.name}_{cell.name}"
+    with tempfile.TemporaryDirectory() as directory:
+        gdspath = c.write_gds(Path(directory) / f"{os.getpid()}.gds")
+        return c.name, gdspath.read_bytes()
+
+
+def _merge_gds(name: str, data: bytes) -> gf.Component:
+    """Loads a variant built by a worker into the active layout."""
+    layout = gf.kcl.layout
+    options = kf.utilities.load_layout_options()
+    options.cell_conflict_resolution = (
+        kf.kdb.LoadLayoutOptions.CellConflictResolution.SkipNewCell
+    )
+    existing = {cell.cell_index() for cell in layout.each_cell()}
+    layout.read_bytes(data, options)
+    # Registers the port cross sections that came with the file
+    gf.kcl.get_meta_data()
+
+    # Restore the ports and settings of the new cells, children first
+    new_cells = [cell for cell in layout.each_cell() if cell.cell_index() not in existing]
+    for cell in sorted(new_cells, key=lambda cell: cell.hierarchy_levels()):
+        gf.kcl[cell.cell_index()].get_meta_data()
+    return gf.Component(base=gf.kcl[name].base)
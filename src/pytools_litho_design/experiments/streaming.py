@@ -0,0 +1,189 @@
+"""Writing large layouts to GDS one component at a time.
+
+KLayout writes complete layouts, so every component is serialised on its own
+and its structures are appended to one open GDS file. Structures that are
+already in the file are skipped, which keeps cells shared by several
+components (tapers, labels, pads) unique. Once a component is written it can
+be removed from the layout with :func:`prune_cell`, so the memory use does not
+grow with the number of components.
+"""
+
+import struct
+from pathlib import Path
+from typing import BinaryIO
+
+import gdsfactory as gf
+import kfactory as kf
+
+# GDS record types
+_BGNSTR = 0x05
+_STRNAME = 0x06
+_ENDSTR = 0x07
+_ENDLIB = 0x04
+_SREF = 0x0A
+_SNAME = 0x12
+_XY = 0x10
+_ENDEL = 0x11
+
+
+def _record(record_type: int, data_type: int, payload: bytes = b"") -> bytes:
+    return struct.pack(">HBB", len(payload) + 4, record_type, data_type) + payload
+
+
+def _string(text: str) -> bytes:
+    data = text.encode()
+    return data + b"\0" * (len(data) % 2)
+
+
+def _records(data: bytes):
+    """Yields the record type and the raw bytes of every record in a GDS stream."""
+    position = 0
+    while position + 4 <= len(data):
+        (length,) = struct.unpack_from(">H", data, position)
+        if length == 0:
+            break
+        yield data[position + 2], data[position : position + length]
+        position += length
+
+
+def _save_options() -> kf.kdb.SaveLayoutOptions:
+    """Returns GDS options without context info that select no cells yet."""
+    options = kf.utilities.save_layout_options()
+    options.format = "GDS2"
+    options.write_context_info = False
+    options.clear_cells()
+    return options
+
+
+class GdsStreamWriter:
+    """Appends components to a GDS file as soon as they are built.
+
+    Parameters
+    ----------
+    path: str | Path
+        The GDS file to write.
+    top_name: str | None
+        If given, a top cell with this name that references all components
+        written with a position is added when the writer is closed.
+
+    The file holds the geometry only, the ports and settings of the cells are
+    not stored.
+    """
+
+    def __init__(self, path: str | Path, top_name: str | None = None) -> None:
+        self.path = Path(path)
+        self.top_name = top_name
+        self._file: BinaryIO = open(self.path, "wb")
+        self._written: set[str] = set()
+        self._references: list[tuple[str, int, int]] = []
+        self._header_written = False
+
+    def write(
+        self,
+        component: gf.Component,
+        position: tuple[float, float] | None = None,
+    ) -> None:
+        """Writes a component and all of its children that are not in the file yet.
+
+        Parameters
+        ----------
+        component: gf.Component
+            The component to write.
+        position: tuple[float, float] | None
+            Where the component is placed in the top cell, it is not placed
+            if None.
+        """
+        layout = component.kcl.layout
+        options = _save_options()
+        options.add_cell(component.cell_index())
+        data = layout.write_bytes(options)
+
+        structure: list[bytes] = []
+        name = None
+        for record_type, record in _records(data):
+            if record_type == _BGNSTR:
+                structure = [record]
+                continue
+            if record_type == _ENDLIB:
+                break
+            if not structure:
+                # The library header is the same for every component
+                if not self._header_written:
+                    self._file.write(record)
+                continue
+            structure.append(record)
+            if record_type == _STRNAME:
+                name = record[4:].rstrip(b"\0").decode()
+            elif record_type == _ENDSTR:
+                if name not in self._written:
+                    self._file.write(b"".join(structure))
+                    self._written.add(name)
+                structure = []
+        self._header_written = True
+
+        if position is not None:
+            x, y = position
+            dbu = component.kcl.dbu
+            self._references.append(
+                (component.name, round(x / dbu), round(y / dbu))
+            )
+
+    def close(self) -> None:
+        """Writes the top cell and the end of the library and closes the file.
+
+        A writer that never wrote a component still leaves a valid library,
+        with only the (empty) top cell if top_name is given.
+        """
+        if self._file.closed:
+            return
+        if not self._header_written:
+            # Nothing was written, the header of the empty active layout makes
+            # it a valid (empty) library
+            data = gf.kcl.layout.write_bytes(_save_options())
+            for record_type, record in _records(data):
+                if record_type == _ENDLIB:
+                    break
+                self._file.write(record)
+            self._header_written = True
+        if self.top_name is not None:
+            self._file.write(_record(_BGNSTR, 0x02, bytes(24)))
+            self._file.write(_record(_STRNAME, 0x06, _string(self.top_name)))
+            for name, x, y in self._references:
+                self._file.write(_record(_SREF, 0x00))
+                self._file.write(_record(_SNAME, 0x06, _string(name)))
+                self._file.write(_record(_XY, 0x03, struct.pack(">ii", x, y)))
+                self._file.write(_record(_ENDEL, 0x00))
+            self._file.write(_record(_ENDSTR, 0x00))
+        self._file.write(_record(_ENDLIB, 0x00))
+        self._file.close()
+
+    def __enter__(self) -> "GdsStreamWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def prune_cell(component: gf.Component, keep: set[int] | None = None) -> None:
+    """Deletes a cell and all of its children that are not used anywhere else.
+
+    Parameters
+    ----------
+    component: gf.Component
+        The cell to delete, it must not be instantiated in other cells.
+    keep: set[int] | None
+        Indices of cells that are never deleted, for example the cells that
+        existed before a sweep started.
+    """
+    kcl = component.kcl
+    layout = kcl.layout
+    keep = keep or set()
+    pending = [component.cell_index()]
+    while pending:
+        index = pending.pop()
+        cell = layout.cell(index)
+        if cell is None or index in keep or cell.parent_cells() > 0:
+            continue
+        children = list(cell.each_child_cell())
+        kcl.delete_cell(index)
+        pending.extend(children)
@@ -20,6 +20,8 @@ def get_demo_pdk(activate: bool = False) -> gf.Pdk:
         "metal_spacing": 10,
         "pad_pitch": 100,
         "pad_size": (100, 100),
+        # Maximum deviation of discretised arcs from the ideal curve in nm
+        "arc_tolerance": 1,
     }
 
     generic_pdk = gf.generic_tech.get_generic_pdk()
@@ -77,3 +77,26 @@ DEMO_TRANSITIONS = {
     #     use_slab_port=False,
     # ),
 }
+
+
+def precompute_transitions(transitions: dict = DEMO_TRANSITIONS) -> None:
+    """Builds the cached transitions of a PDK with their default settings.
+
+    Only the transitions built from the shared transition cells (sine tapers and
+    tapers to ridges) are built, so routes and devices that use them later get
+    references to the existing cells. Only the default widths and lengths of
+    the transitions are built, which are not necessarily the widths a route
+    asks for, so this is not called on PDK activation. Call it after
+    activating the PDK when the default transitions are used directly.
+    Transitions with other widths are built and cached the first time they
+    are used.
+
+    Parameters
+    ----------
+    transitions: dict
+        The layer transitions of the PDK.
+    """
+    for factory in transitions.values():
+        func = factory.func if isinstance(factory, partial) else factory
+        if func in (sine_taper, taper_to_ridge):
+            factory()